@@ -1,35 +1,85 @@
+from datetime import datetime, timedelta
+
 import django_filters
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramWordSimilarity
+from django.db.models import F, Q
+from rest_framework.filters import OrderingFilter, SearchFilter
+
 from .models import Arena
-from django.db.models import Min
 
 
 class ArenaFilter(django_filters.FilterSet):
     min_price = django_filters.NumberFilter(method="filter_min_price")
     max_price = django_filters.NumberFilter(method="filter_max_price")
     available_date = django_filters.DateFilter(method="filter_available")
+    # only narrow `available_date`, see filter_available
+    available_from = django_filters.TimeFilter(method="filter_window")
+    available_to = django_filters.TimeFilter(method="filter_window")
+    min_duration = django_filters.NumberFilter(method="filter_window", min_value=1, max_value=24 * 60)
 
     class Meta:
         model = Arena
         fields = ["city", "sport_type"]
 
     def filter_min_price(self, queryset, name, value):
-        return queryset.filter(prices__price_per_hour__gte=value)
+        # some price of the arena is at least `value`
+        return queryset.filter(max_price_per_hour__gte=value)
 
     def filter_max_price(self, queryset, name, value):
-        return queryset.filter(prices__price_per_hour__lte=value)
+        # some price of the arena is at most `value`
+        return queryset.filter(min_price_per_hour__lte=value)
+
+    def filter_window(self, queryset, name, value):
+        return queryset
 
     def filter_available(self, queryset, name, value):
-        # Arenala shu kunda band bo'lmagan va shu kunda ishlaydigan bo'lishi kerak
-        # Step 1: ishlaydigan maydonlar
-        weekday = value.weekday()
-        working = queryset.filter(working_hours__day_of_week=weekday)
-
-        # Step 2: shu kunda band bo'lgan arenalar
-        from apps.bookings.models import Booking, BookingStatus
-        busy = Booking.objects.filter(
-            date=value,
-            status__in=[BookingStatus.PENDING, BookingStatus.APPROVED]
-        ).values_list("arena_id", flat=True)
-
-        # Step 3: busy bo'lmagan arenalar
-        return working.exclude(id__in=busy)
+        """
+        Arenas open on `available_date` with a free gap of `min_duration`
+        minutes inside [`available_from`, `available_to`]. Without
+        `min_duration` the whole window must be free, or one default slot
+        when no window was given.
+        """
+        from apps.bookings.services import arenas_with_free_gap
+
+        window_start = self.form.cleaned_data.get("available_from")
+        window_end = self.form.cleaned_data.get("available_to")
+        minutes = self.form.cleaned_data.get("min_duration")
+
+        if window_start is not None and window_end is not None and window_start >= window_end:
+            return queryset.none()
+
+        if minutes:
+            duration = timedelta(minutes=int(minutes))
+        elif window_start is not None and window_end is not None:
+            duration = datetime.combine(value, window_end) - datetime.combine(value, window_start)
+        else:
+            duration = None
+
+        return arenas_with_free_gap(queryset, value, window_start, window_end, duration)
+
+
+class ArenaSearchFilter(SearchFilter):
+    """
+    `?search=` backed by the GIN-indexed `Arena.search_vector` column, with
+    pg_trgm word similarity on the name to tolerate typos. Results come back
+    ranked by relevance unless the client passed an explicit `ordering`.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        terms = " ".join(self.get_search_terms(request))
+        if not terms:
+            return queryset
+
+        query = SearchQuery(terms, search_type="websearch", config="simple")
+        queryset = queryset.annotate(
+            search_rank=SearchRank(F("search_vector"), query),
+            name_similarity=TrigramWordSimilarity(terms, "name"),
+        ).filter(
+            Q(search_vector=query) | Q(name__trigram_word_similar=terms)
+        )
+
+        if not request.query_params.get(OrderingFilter.ordering_param):
+            queryset = queryset.order_by(
+                (F("search_rank") + F("name_similarity")).desc(), "-rating", "id"
+            )
+        return queryset
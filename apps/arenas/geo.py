@@ -0,0 +1,63 @@
+import math
+
+from django.db.models import F, FloatField, Value
+from django.db.models.functions import ASin, Cos, Power, Radians, Sin, Sqrt
+
+EARTH_RADIUS_KM = 6371.0088
+
+# Arenas are bucketed into a fixed lat/lng grid. A 0.1° cell is ~11 km tall,
+# so a 50 km radius search touches roughly a hundred cells.
+GRID_CELL_DEGREES = 0.1
+GRID_COLUMNS = int(360 / GRID_CELL_DEGREES)
+
+
+def grid_cell(latitude, longitude):
+    """Return the integer grid cell for a point, or None if it has no coordinates."""
+    if latitude is None or longitude is None:
+        return None
+    row = int(math.floor((latitude + 90) / GRID_CELL_DEGREES))
+    col = int(math.floor((longitude + 180) / GRID_CELL_DEGREES)) % GRID_COLUMNS
+    return row * GRID_COLUMNS + col
+
+
+def cells_in_radius(latitude, longitude, radius_km):
+    """
+    All grid cells intersecting the bounding box of a circle around the point.
+    """
+    lat_delta = math.degrees(radius_km / EARTH_RADIUS_KM)
+    min_lat = max(latitude - lat_delta, -90.0)
+    max_lat = min(latitude + lat_delta, 90.0 - 1e-9)
+
+    # the box is widest on the edge closest to the pole
+    widest = max(abs(min_lat), abs(max_lat))
+    cos_lat = math.cos(math.radians(widest))
+    if cos_lat < 1e-6:
+        lng_delta = 180.0
+    else:
+        lng_delta = min(math.degrees(radius_km / (EARTH_RADIUS_KM * cos_lat)), 180.0)
+
+    min_row = grid_cell(min_lat, 0) // GRID_COLUMNS
+    max_row = grid_cell(max_lat, 0) // GRID_COLUMNS
+    if lng_delta >= 180.0:
+        cols = range(GRID_COLUMNS)
+    else:
+        first = grid_cell(0, longitude - lng_delta) % GRID_COLUMNS
+        last = grid_cell(0, longitude + lng_delta) % GRID_COLUMNS
+        if first <= last:
+            cols = range(first, last + 1)
+        else:  # box crosses the antimeridian
+            cols = list(range(first, GRID_COLUMNS)) + list(range(0, last + 1))
+
+    return [row * GRID_COLUMNS + col for row in range(min_row, max_row + 1) for col in cols]
+
+
+def haversine_km(latitude, longitude):
+    """
+    SQL expression for the great-circle distance between the row's
+    coordinates and the given point, in kilometres.
+    """
+    lat = math.radians(latitude)
+    d_lat = (Radians(F("latitude")) - Value(lat)) / 2
+    d_lng = (Radians(F("longitude")) - Value(math.radians(longitude))) / 2
+    a = Power(Sin(d_lat), 2) + Value(math.cos(lat)) * Cos(Radians(F("latitude"))) * Power(Sin(d_lng), 2)
+    return ASin(Sqrt(a), output_field=FloatField()) * Value(2 * EARTH_RADIUS_KM)
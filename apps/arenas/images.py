@@ -0,0 +1,75 @@
+"""
+Background processing of uploaded arena photos.
+
+Uploads are stored as-is with processed_at unset, which marks them pending.
+The process_arena_images command, run as its own worker with --interval
+(see docker-compose-deploy.yml), sweeps pending images, writes EXIF-free
+WebP and JPEG renditions next to the original and records them on the
+ArenaImage row; request workers never decode images. A pending image is
+retried on every sweep until it succeeds.
+"""
+import os
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from .models import Arena, ArenaImage
+
+# name -> bounding box; images are only ever scaled down
+RENDITIONS = {
+    "thumb": (320, 320),
+    "medium": (1024, 1024),
+}
+
+FORMATS = {
+    "webp": ("WEBP", {"quality": 80, "method": 4}),
+    "jpeg": ("JPEG", {"quality": 82, "optimize": True, "progressive": True}),
+}
+
+def _to_rgb(image):
+    if image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info):
+        image = image.convert("RGBA")
+        background = Image.new("RGB", image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel("A"))
+        return background
+    return image.convert("RGB")
+
+
+def process_arena_image(image_id):
+    arena_image = ArenaImage.objects.filter(pk=image_id).first()
+    if arena_image is None:
+        return
+
+    with arena_image.image.open("rb") as source, Image.open(source) as original:
+        # apply the camera orientation before EXIF is dropped
+        picture = _to_rgb(ImageOps.exif_transpose(original))
+
+    stem = os.path.splitext(os.path.basename(arena_image.image.name))[0]
+    renditions = {}
+    for name, box in RENDITIONS.items():
+        resized = picture.copy()
+        resized.thumbnail(box, Image.Resampling.LANCZOS)
+        entry = {"width": resized.width, "height": resized.height}
+        for extension, (pil_format, options) in FORMATS.items():
+            buffer = BytesIO()
+            # no exif= argument, so no metadata is written
+            resized.save(buffer, pil_format, **options)
+            entry[extension] = default_storage.save(
+                f"arenas/renditions/{stem}_{name}.{extension}", ContentFile(buffer.getvalue())
+            )
+        renditions[name] = entry
+
+    now = timezone.now()
+    ArenaImage.objects.filter(pk=arena_image.pk).update(
+        width=picture.width,
+        height=picture.height,
+        renditions=renditions,
+        processed_at=now,
+    )
+    Arena.objects.filter(pk=arena_image.arena_id).update(updated_at=now)
+
+    from .popularity import invalidate_popular
+    invalidate_popular()
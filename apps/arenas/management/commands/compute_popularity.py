@@ -0,0 +1,12 @@
+# apps/arenas/management/commands/compute_popularity.py
+from django.core.management.base import BaseCommand
+
+from apps.arenas.popularity import compute_popularity
+
+
+class Command(BaseCommand):
+    help = "Rebuild the per city/sport popular arenas ranking (run periodically, e.g. hourly)"
+
+    def handle(self, *args, **options):
+        rows = compute_popularity()
+        self.stdout.write(self.style.SUCCESS(f"Stored {rows} ranked arenas"))
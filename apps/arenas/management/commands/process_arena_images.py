@@ -0,0 +1,42 @@
+# apps/arenas/management/commands/process_arena_images.py
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.arenas.images import process_arena_image
+from apps.arenas.models import ArenaImage
+
+
+class Command(BaseCommand):
+    help = "Generate renditions for arena images that have not been processed yet"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, default=None)
+        parser.add_argument(
+            "--interval", type=int, default=0,
+            help="Keep running and sweep every N seconds (0 = sweep once and exit)",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            done, failed = self.sweep(options["limit"])
+            if done or failed or not options["interval"]:
+                self.stdout.write(self.style.SUCCESS(f"Processed {done} images, {failed} failed"))
+            if not options["interval"]:
+                break
+            time.sleep(options["interval"])
+
+    def sweep(self, limit):
+        pending = ArenaImage.objects.filter(processed_at__isnull=True).order_by("pk").values_list("pk", flat=True)
+        if limit:
+            pending = pending[:limit]
+
+        done = failed = 0
+        for image_id in pending:
+            try:
+                process_arena_image(image_id)
+                done += 1
+            except Exception as exc:
+                failed += 1
+                self.stderr.write(f"Image {image_id}: {exc}")
+        return done, failed
@@ -0,0 +1,48 @@
+# apps/arenas/management/commands/recompute_ratings.py
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.arenas.models import Arena
+from apps.arenas.signals import rating_totals, rebuild_review_summaries
+
+
+class Command(BaseCommand):
+    help = "Recompute arena rating totals and review summaries from reviews, in chunks (repair tool)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        chunk_size = options["chunk_size"]
+        last_id = 0
+        fixed = total = 0
+
+        while True:
+            with transaction.atomic():
+                # locking the chunk makes concurrent review signals wait and
+                # apply their delta on top of the recomputed totals
+                arenas = list(
+                    Arena.objects.select_for_update()
+                    .filter(pk__gt=last_id)
+                    .order_by("pk")
+                    .only("pk", "rating", "rating_sum", "rating_count")[:chunk_size]
+                )
+                if not arenas:
+                    break
+
+                totals = rating_totals([arena.pk for arena in arenas])
+                changed = []
+                for arena in arenas:
+                    rating_sum, rating_count = totals.get(arena.pk, (0, 0))
+                    rating = rating_sum / rating_count if rating_count else 0
+                    if (arena.rating_sum, arena.rating_count, arena.rating) != (rating_sum, rating_count, rating):
+                        arena.rating_sum, arena.rating_count, arena.rating = rating_sum, rating_count, rating
+                        changed.append(arena)
+                Arena.objects.bulk_update(changed, ["rating_sum", "rating_count", "rating"])
+                rebuild_review_summaries([arena.pk for arena in arenas])
+
+            last_id = arenas[-1].pk
+            total += len(arenas)
+            fixed += len(changed)
+
+        self.stdout.write(self.style.SUCCESS(f"Checked {total} arenas, fixed {fixed}"))
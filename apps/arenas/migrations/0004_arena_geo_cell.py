@@ -0,0 +1,29 @@
+# Generated by Django 5.2.7 on 2026-10-18 09:34
+
+from django.db import migrations, models
+
+from apps.arenas.geo import grid_cell
+
+
+def fill_geo_cell(apps, schema_editor):
+    Arena = apps.get_model("arenas", "Arena")
+    arenas = list(Arena.objects.filter(latitude__isnull=False, longitude__isnull=False))
+    for arena in arenas:
+        arena.geo_cell = grid_cell(arena.latitude, arena.longitude)
+    Arena.objects.bulk_update(arenas, ["geo_cell"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('arenas', '0003_favorite_review'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='arena',
+            name='geo_cell',
+            field=models.IntegerField(blank=True, db_index=True, editable=False, null=True),
+        ),
+        migrations.RunPython(fill_geo_cell, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.7 on 2026-10-18 09:36
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Max, Min, OuterRef, Subquery
+
+
+def fill_price_range(apps, schema_editor):
+    Arena = apps.get_model("arenas", "Arena")
+    PriceTable = apps.get_model("arenas", "PriceTable")
+    prices = PriceTable.objects.filter(arena=OuterRef("pk")).values("arena")
+    Arena.objects.update(
+        min_price_per_hour=Subquery(prices.annotate(low=Min("price_per_hour")).values("low")),
+        max_price_per_hour=Subquery(prices.annotate(high=Max("price_per_hour")).values("high")),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('arenas', '0005_arena_search'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='arena',
+            name='max_price_per_hour',
+            field=models.DecimalField(blank=True, decimal_places=2, editable=False, max_digits=10, null=True),
+        ),
+        migrations.AddField(
+            model_name='arena',
+            name='min_price_per_hour',
+            field=models.DecimalField(blank=True, decimal_places=2, editable=False, max_digits=10, null=True),
+        ),
+        migrations.RunPython(fill_price_range, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='arena',
+            index=models.Index(fields=['city', 'sport_type', 'min_price_per_hour'], name='arena_city_sport_minprice_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='arena',
+            index=models.Index(fields=['city', 'sport_type', 'max_price_per_hour'], name='arena_city_sport_maxprice_idx'),
+        ),
+    ]
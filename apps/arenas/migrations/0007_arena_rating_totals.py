@@ -0,0 +1,36 @@
+# Generated by Django 5.2.7 on 2026-10-18 09:37
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def fill_rating_totals(apps, schema_editor):
+    Arena = apps.get_model("arenas", "Arena")
+    Review = apps.get_model("arenas", "Review")
+    reviews = Review.objects.filter(arena=OuterRef("pk")).order_by().values("arena")
+    Arena.objects.update(
+        rating_sum=Coalesce(Subquery(reviews.annotate(total=Sum("rating")).values("total")), 0),
+        rating_count=Coalesce(Subquery(reviews.annotate(count=Count("id")).values("count"), output_field=IntegerField()), 0),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('arenas', '0006_arena_price_range'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='arena',
+            name='rating_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='arena',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(fill_rating_totals, migrations.RunPython.noop),
+    ]
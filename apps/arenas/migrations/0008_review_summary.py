@@ -0,0 +1,57 @@
+# Generated by Django 5.2.7 on 2026-10-18 09:37
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def fill_review_summaries(apps, schema_editor):
+    Review = apps.get_model("arenas", "Review")
+    ReviewSummary = apps.get_model("arenas", "ReviewSummary")
+
+    summaries = {}
+    rows = Review.objects.order_by().values_list("arena_id", "rating").annotate(count=Count("id"))
+    for arena_id, star, count in rows:
+        summary = summaries.setdefault(arena_id, ReviewSummary(arena_id=arena_id))
+        setattr(summary, f"stars_{star}", count)
+
+    for arena_id, summary in summaries.items():
+        summary.latest = list(
+            Review.objects.filter(arena_id=arena_id).order_by("-created_at").values_list("pk", flat=True)[:5]
+        )
+    ReviewSummary.objects.bulk_create(summaries.values(), batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('arenas', '0007_arena_rating_totals'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReviewSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('stars_1', models.PositiveIntegerField(default=0)),
+                ('stars_2', models.PositiveIntegerField(default=0)),
+                ('stars_3', models.PositiveIntegerField(default=0)),
+                ('stars_4', models.PositiveIntegerField(default=0)),
+                ('stars_5', models.PositiveIntegerField(default=0)),
+                ('latest', models.JSONField(blank=True, default=list)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['arena', '-created_at'], name='review_arena_created_idx'),
+        ),
+        migrations.AddField(
+            model_name='reviewsummary',
+            name='arena',
+            field=models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='review_summary', to='arenas.arena'),
+        ),
+        migrations.RunPython(fill_review_summaries, migrations.RunPython.noop),
+    ]
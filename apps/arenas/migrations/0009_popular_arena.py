@@ -0,0 +1,29 @@
+# Generated by Django 5.2.7 on 2026-10-18 09:39
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('arenas', '0008_review_summary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PopularArena',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.PositiveSmallIntegerField()),
+                ('score', models.FloatField()),
+                ('arena', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='arenas.arena')),
+                ('city', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='arenas.city')),
+                ('sport_type', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='arenas.sporttype')),
+            ],
+            options={
+                'ordering': ['rank'],
+                'indexes': [models.Index(fields=['city', 'sport_type', 'rank'], name='popular_segment_rank_idx')],
+            },
+        ),
+    ]
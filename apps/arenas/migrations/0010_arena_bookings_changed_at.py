@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 09:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('arenas', '0009_popular_arena'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='arena',
+            name='bookings_changed_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.7 on 2026-10-18 10:07
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def create_version_row(apps, schema_editor):
+    # start from the clock, like reference.bump_version, not from 0
+    version = int(timezone.now().timestamp() * 1000)
+    apps.get_model("arenas", "ReferenceDataVersion").objects.create(pk=1, version=version)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('arenas', '0011_arena_image_renditions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReferenceDataVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveBigIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(create_version_row, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.7 on 2026-10-18 10:20
+
+from django.db import migrations
+
+
+def keep_only_review_ids(apps, schema_editor):
+    # summaries written before this stored serialized reviews
+    ReviewSummary = apps.get_model("arenas", "ReviewSummary")
+    for summary in ReviewSummary.objects.iterator(chunk_size=500):
+        ids = [item["id"] if isinstance(item, dict) else item for item in summary.latest_ids]
+        if ids != summary.latest_ids:
+            ReviewSummary.objects.filter(pk=summary.pk).update(latest_ids=ids)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('arenas', '0012_reference_data_version'),
+    ]
+
+    operations = [
+        migrations.RenameField(
+            model_name='reviewsummary',
+            old_name='latest',
+            new_name='latest_ids',
+        ),
+        migrations.RunPython(keep_only_review_ids, migrations.RunPython.noop),
+    ]
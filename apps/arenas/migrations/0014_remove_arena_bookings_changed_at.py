@@ -0,0 +1,17 @@
+# Generated by Django 5.2.7 on 2026-10-18 10:23
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('arenas', '0013_review_summary_latest_ids'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='arena',
+            name='bookings_changed_at',
+        ),
+    ]
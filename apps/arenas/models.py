@@ -1,6 +1,11 @@
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector, SearchVectorField
 from django.db import models
+from django.db.models import Exists, OuterRef, Value
 from django.conf import settings
 
+from .geo import grid_cell
+
 
 class City(models.Model):
     name = models.CharField(max_length=100, unique=True)
@@ -16,6 +21,30 @@ class SportType(models.Model):
         return self.name
 
 
+class ReferenceDataVersion(models.Model):
+    """
+    Single row counting writes to cities and sport types; bumped in the
+    writing transaction, see apps.arenas.reference.
+    """
+    version = models.PositiveBigIntegerField(default=0)
+
+
+class ArenaQuerySet(models.QuerySet):
+    def for_listing(self, user=None):
+        """
+        Load everything ArenaSerializer reads in a fixed number of queries:
+        nested sets prefetched and `is_favorite` annotated instead of queried
+        per row. City and sport type come from the reference snapshot.
+        """
+        queryset = self.prefetch_related(
+            "images", "working_hours", "prices"
+        )
+        if user is not None and user.is_authenticated:
+            favorites = Favorite.objects.filter(arena=OuterRef("pk"), user=user)
+            return queryset.annotate(is_favorite=Exists(favorites))
+        return queryset.annotate(is_favorite=Value(False))
+
+
 class Arena(models.Model):
     owner = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -30,37 +59,84 @@ class Arena(models.Model):
     address = models.CharField(max_length=255)
     latitude = models.FloatField(null=True, blank=True)
     longitude = models.FloatField(null=True, blank=True)
+    # coarse lat/lng grid bucket (see apps.arenas.geo), kept in sync in save()
+    geo_cell = models.IntegerField(null=True, blank=True, db_index=True, editable=False)
 
     is_active = models.BooleanField(default=True)
+    # rating = rating_sum / rating_count, all three kept by signals.update_arena_rating
     rating = models.FloatField(default=0)
+    rating_sum = models.PositiveIntegerField(default=0, editable=False)
+    rating_count = models.PositiveIntegerField(default=0, editable=False)
+
+    # denormalized from PriceTable by signals.update_arena_price_range
+    min_price_per_hour = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True, editable=False)
+    max_price_per_hour = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True, editable=False)
 
     created_at = models.DateTimeField(auto_now_add=True)
+    # also bumped when images, working hours or prices change
     updated_at = models.DateTimeField(auto_now=True)
 
+    # maintained by Postgres itself, see ArenaSearchFilter
+    search_vector = models.GeneratedField(
+        expression=(
+            SearchVector("name", weight="A", config="simple")
+            + SearchVector("address", weight="B", config="simple")
+            + SearchVector("description", weight="C", config="simple")
+        ),
+        output_field=SearchVectorField(),
+        db_persist=True,
+    )
+
+    objects = ArenaQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=["search_vector"], name="arena_search_vector_idx"),
+            GinIndex(fields=["name"], name="arena_name_trgm_idx", opclasses=["gin_trgm_ops"]),
+            models.Index(fields=["city", "sport_type", "min_price_per_hour"], name="arena_city_sport_minprice_idx"),
+            models.Index(fields=["city", "sport_type", "max_price_per_hour"], name="arena_city_sport_maxprice_idx"),
+        ]
+
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        self.geo_cell = grid_cell(self.latitude, self.longitude)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and {"latitude", "longitude"} & set(update_fields):
+            kwargs["update_fields"] = {*update_fields, "geo_cell"}
+        super().save(*args, **kwargs)
+
 
 class ArenaImage(models.Model):
     arena = models.ForeignKey(Arena, on_delete=models.CASCADE, related_name="images")
     image = models.ImageField(upload_to="arenas/")
     is_main = models.BooleanField(default=False)
 
+    # filled in the background by apps.arenas.images
+    width = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    height = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    renditions = models.JSONField(default=dict, blank=True, editable=False)
+    processed_at = models.DateTimeField(null=True, blank=True, editable=False)
+
     def __str__(self):
         return f"Image for {self.arena.name}"
 
 
+WEEKDAY_CHOICES = [
+    (0, "Monday"),
+    (1, "Tuesday"),
+    (2, "Wednesday"),
+    (3, "Thursday"),
+    (4, "Friday"),
+    (5, "Saturday"),
+    (6, "Sunday"),
+]
+
+
 class WorkingHours(models.Model):
     arena = models.ForeignKey(Arena, on_delete=models.CASCADE, related_name="working_hours")
-    day_of_week = models.IntegerField(choices=[
-        (0, "Monday"),
-        (1, "Tuesday"),
-        (2, "Wednesday"),
-        (3, "Thursday"),
-        (4, "Friday"),
-        (5, "Saturday"),
-        (6, "Sunday"),
-    ])
+    day_of_week = models.IntegerField(choices=WEEKDAY_CHOICES)
     open_time = models.TimeField()
     close_time = models.TimeField()
 
@@ -104,10 +180,51 @@ class Review(models.Model):
     class Meta:
         unique_together = ("arena", "user")  # 1 user → 1 review per arena
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["arena", "-created_at"], name="review_arena_created_idx"),
+        ]
 
     def __str__(self):
         return f"{self.arena.name} review by {self.user.username}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # the stored rating, so signals can apply just the difference on save
+        instance._loaded_rating = instance.__dict__.get("rating")
+        return instance
+
+
+class ReviewSummary(models.Model):
+    """
+    Per-arena star histogram and the ids of the latest reviews, kept up to
+    date by the review signals so detail pages never scan or count reviews.
+    The reviews themselves are serialized at read time.
+    """
+    LATEST_COUNT = 5
+
+    arena = models.OneToOneField(
+        Arena,
+        on_delete=models.CASCADE,
+        related_name="review_summary"
+    )
+    stars_1 = models.PositiveIntegerField(default=0)
+    stars_2 = models.PositiveIntegerField(default=0)
+    stars_3 = models.PositiveIntegerField(default=0)
+    stars_4 = models.PositiveIntegerField(default=0)
+    stars_5 = models.PositiveIntegerField(default=0)
+    # newest first
+    latest_ids = models.JSONField(default=list, blank=True)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Review summary for {self.arena_id}"
+
+    @property
+    def histogram(self):
+        return {str(star): getattr(self, f"stars_{star}") for star in range(1, 6)}
+
 
 class Favorite(models.Model):
     user = models.ForeignKey(
@@ -127,3 +244,25 @@ class Favorite(models.Model):
 
     def __str__(self):
         return f"{self.user.username} → {self.arena.name}"
+
+
+class PopularArena(models.Model):
+    """
+    Precomputed popularity ranking, one ranked list per segment. A null
+    city or sport_type means "any"; both null is the global list.
+    Rebuilt by the `compute_popularity` command, see apps.arenas.popularity.
+    """
+    city = models.ForeignKey(City, on_delete=models.CASCADE, null=True, blank=True, related_name="+")
+    sport_type = models.ForeignKey(SportType, on_delete=models.CASCADE, null=True, blank=True, related_name="+")
+    arena = models.ForeignKey(Arena, on_delete=models.CASCADE, related_name="+")
+    rank = models.PositiveSmallIntegerField()
+    score = models.FloatField()
+
+    class Meta:
+        ordering = ["rank"]
+        indexes = [
+            models.Index(fields=["city", "sport_type", "rank"], name="popular_segment_rank_idx"),
+        ]
+
+    def __str__(self):
+        return f"#{self.rank} {self.arena_id} ({self.city_id}/{self.sport_type_id})"
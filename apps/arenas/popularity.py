@@ -0,0 +1,145 @@
+import heapq
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Arena, Favorite, PopularArena
+from .serializers import ArenaCardSerializer
+
+POPULAR_LIMIT = 10
+BOOKINGS_WINDOW_DAYS = 30
+
+# score = bookings * 3 + favorites * 2 + bayesian rating * 5
+BOOKING_WEIGHT = 3
+FAVORITE_WEIGHT = 2
+RATING_WEIGHT = 5
+# rating is pulled towards RATING_PRIOR until an arena has a few reviews
+RATING_PRIOR = 3.0
+RATING_PRIOR_COUNT = 5
+
+CACHE_VERSION_KEY = "popular:version"
+CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def _version():
+    version = cache.get(CACHE_VERSION_KEY)
+    if version is None:
+        version = int(timezone.now().timestamp())
+        cache.add(CACHE_VERSION_KEY, version, None)
+        version = cache.get(CACHE_VERSION_KEY, version)
+    return version
+
+
+def invalidate_popular():
+    """Drop every cached ranking; the next request per segment rebuilds it."""
+    try:
+        cache.incr(CACHE_VERSION_KEY)
+    except ValueError:
+        cache.set(CACHE_VERSION_KEY, int(timezone.now().timestamp()), None)
+
+
+def _score(arena):
+    bayesian_rating = (arena.rating_sum + RATING_PRIOR * RATING_PRIOR_COUNT) / (arena.rating_count + RATING_PRIOR_COUNT)
+    return (
+        BOOKING_WEIGHT * arena.recent_bookings
+        + FAVORITE_WEIGHT * arena.favorites
+        + RATING_WEIGHT * bayesian_rating
+    )
+
+
+def compute_popularity():
+    """
+    Score every active arena from recent bookings, favorites and rating,
+    store the top POPULAR_LIMIT per (city, sport_type) segment and
+    invalidate the cache. Returns the number of stored rows.
+    """
+    from apps.bookings.models import Booking, BookingStatus
+
+    since = timezone.localdate() - timedelta(days=BOOKINGS_WINDOW_DAYS)
+    recent_bookings = (
+        Booking.objects.filter(
+            arena=OuterRef("pk"),
+            date__gte=since,
+            status__in=[BookingStatus.APPROVED, BookingStatus.COMPLETED],
+        )
+        .order_by()
+        .values("arena")
+        .annotate(count=Count("id"))
+        .values("count")
+    )
+    favorites = (
+        Favorite.objects.filter(arena=OuterRef("pk"))
+        .order_by()
+        .values("arena")
+        .annotate(count=Count("id"))
+        .values("count")
+    )
+    arenas = Arena.objects.filter(is_active=True).annotate(
+        recent_bookings=Coalesce(Subquery(recent_bookings, output_field=IntegerField()), Value(0)),
+        favorites=Coalesce(Subquery(favorites, output_field=IntegerField()), Value(0)),
+    ).only("id", "city_id", "sport_type_id", "rating_sum", "rating_count")
+
+    # per segment a min-heap of the best POPULAR_LIMIT (score, -arena_id) so far;
+    # ties go to the lower id, so the worst entry is the smallest tuple
+    segments = {}
+    for arena in arenas.iterator(chunk_size=2000):
+        entry = (_score(arena), -arena.id)
+        for city_id in (None, arena.city_id):
+            for sport_type_id in (None, arena.sport_type_id):
+                heap = segments.setdefault((city_id, sport_type_id), [])
+                if len(heap) < POPULAR_LIMIT:
+                    heapq.heappush(heap, entry)
+                elif entry > heap[0]:
+                    heapq.heapreplace(heap, entry)
+
+    rows = []
+    for (city_id, sport_type_id), heap in segments.items():
+        ranked = sorted(heap, reverse=True)
+        for rank, (score, negative_id) in enumerate(ranked, start=1):
+            rows.append(PopularArena(
+                city_id=city_id, sport_type_id=sport_type_id,
+                arena_id=-negative_id, rank=rank, score=score,
+            ))
+
+    with transaction.atomic():
+        PopularArena.objects.all().delete()
+        PopularArena.objects.bulk_create(rows, batch_size=1000)
+        transaction.on_commit(invalidate_popular)
+    return len(rows)
+
+
+def popular_arenas(city_id=None, sport_type_id=None):
+    """Serialized ranking for a segment, served from cache after the first hit."""
+    key = f"popular:{_version()}:{city_id or 'all'}:{sport_type_id or 'all'}"
+    data = cache.get(key)
+    if data is None:
+        data = _build_ranking(city_id, sport_type_id)
+        cache.set(key, data, CACHE_TIMEOUT)
+    return data
+
+
+def _build_ranking(city_id, sport_type_id):
+    ranked = list(
+        PopularArena.objects.filter(city_id=city_id, sport_type_id=sport_type_id)
+        .values_list("arena_id", flat=True)
+    )
+    arenas = Arena.objects.filter(is_active=True).prefetch_related("images")
+
+    if ranked:
+        by_id = arenas.in_bulk(ranked)
+        arenas = [by_id[arena_id] for arena_id in ranked if arena_id in by_id]
+    elif not PopularArena.objects.exists():
+        # no ranking computed yet: fall back to the best rated arenas
+        if city_id:
+            arenas = arenas.filter(city_id=city_id)
+        if sport_type_id:
+            arenas = arenas.filter(sport_type_id=sport_type_id)
+        arenas = arenas.order_by("-rating", "id")[:POPULAR_LIMIT]
+    else:
+        arenas = []
+
+    return ArenaCardSerializer(arenas, many=True).data
@@ -0,0 +1,88 @@
+"""
+Process-local snapshot of rarely changing reference data (cities, sport types).
+
+The current version is the ReferenceDataVersion row, bumped inside every
+writing transaction, so every process sees it move exactly when the new rows
+become visible. Each process keeps the snapshot it built last and only
+reloads it when the version moves, from the shared cache or, failing that,
+the database.
+"""
+import hashlib
+import json
+
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import City, ReferenceDataVersion, SportType
+
+VERSION_PK = 1
+# versions are per database, so databases sharing one cache need their own keys
+SNAPSHOT_KEY = "refdata:snapshot:{database}:{version}"
+SNAPSHOT_TIMEOUT = 60 * 60 * 24
+
+KINDS = {
+    "cities": City,
+    "sport_types": SportType,
+}
+
+_local_snapshot = None
+
+
+class ReferenceSnapshot:
+    def __init__(self, version, data):
+        self.version = version
+        self.data = data
+        self.by_id = {
+            kind: {item["id"]: item for item in items}
+            for kind, items in data.items()
+        }
+        self.etags = {
+            kind: '"%s"' % hashlib.sha1(json.dumps(items, sort_keys=True).encode()).hexdigest()
+            for kind, items in data.items()
+        }
+
+    def get(self, kind, pk):
+        return self.by_id[kind].get(pk)
+
+
+def version_queryset():
+    """The version as a one-value queryset, for use in a Subquery."""
+    return ReferenceDataVersion.objects.filter(pk=VERSION_PK).values("version")
+
+
+def current_version():
+    # the row is created by migration 0012
+    return version_queryset().values_list("version", flat=True).get()
+
+
+def bump_version():
+    """Call inside the transaction that writes a city or sport type."""
+    # never below the clock, so a rolled back or recreated row cannot repeat a version
+    clock = int(timezone.now().timestamp() * 1000)
+    version = Greatest(F("version") + 1, Value(clock))
+    if not ReferenceDataVersion.objects.filter(pk=VERSION_PK).update(version=version):
+        ReferenceDataVersion.objects.get_or_create(pk=VERSION_PK, defaults={"version": clock})
+
+
+def get_snapshot():
+    global _local_snapshot
+
+    version = current_version()
+    snapshot = _local_snapshot
+    if snapshot is not None and snapshot.version == version:
+        return snapshot
+
+    key = SNAPSHOT_KEY.format(database=connection.settings_dict["NAME"], version=version)
+    data = cache.get(key)
+    if data is None:
+        data = {
+            kind: list(model.objects.order_by("name").values("id", "name"))
+            for kind, model in KINDS.items()
+        }
+        cache.set(key, data, SNAPSHOT_TIMEOUT)
+
+    snapshot = _local_snapshot = ReferenceSnapshot(version, data)
+    return snapshot
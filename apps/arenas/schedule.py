@@ -0,0 +1,125 @@
+"""
+Compiled, immutable per-arena schedule: opening hours for each weekday and
+hourly prices per day type.
+
+Booking validation, pricing and free-slot lookups all read an arena's
+WorkingHours and PriceTable rows. `get_schedule` serves them from a
+process-wide LRU. The version is the arena's `updated_at`, which every
+write to those tables moves in its own transaction, so each process sees
+the change as soon as it commits and rebuilds only the schedules that
+actually changed.
+"""
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from decimal import ROUND_HALF_UP, Decimal
+from types import MappingProxyType
+
+from django.core.cache import cache
+
+from .models import Arena, PriceTable, WorkingHours
+
+SCHEDULE_KEY = "schedule:{arena_id}:{version}"
+SCHEDULE_TIMEOUT = 60 * 60 * 24
+LOCAL_SIZE = 1024
+
+_local = OrderedDict()
+_lock = threading.Lock()
+
+
+def day_type(date):
+    return "weekday" if date.weekday() < 5 else "weekend"
+
+
+def price_for_duration(price_per_hour, date, start_time, end_time):
+    """
+    Price of [start_time, end_time) on `date`, in Decimal arithmetic and
+    rounded the way numeric(10, 2) stores Booking.total_price, so quotes
+    and saved bookings always agree.
+    """
+    duration = datetime.combine(date, end_time) - datetime.combine(date, start_time)
+    hours = Decimal(duration.total_seconds()) / Decimal(3600)
+    return (price_per_hour * hours).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+
+
+class ArenaSchedule:
+    __slots__ = ("arena_id", "version", "hours", "prices")
+
+    def __init__(self, arena_id, version, hours, prices):
+        # hours: 7-tuple indexed by weekday of (open_time, close_time) or None
+        object.__setattr__(self, "arena_id", arena_id)
+        object.__setattr__(self, "version", version)
+        object.__setattr__(self, "hours", tuple(hours))
+        object.__setattr__(self, "prices", MappingProxyType(dict(prices)))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("ArenaSchedule is immutable")
+
+    def __reduce__(self):
+        return ArenaSchedule, (self.arena_id, self.version, self.hours, dict(self.prices))
+
+    def hours_for(self, date):
+        """(open_time, close_time) on `date`, or None if the arena is closed."""
+        return self.hours[date.weekday()]
+
+    def is_open(self, date, start_time, end_time):
+        """True if [start_time, end_time) lies within the day's opening hours."""
+        hours = self.hours_for(date)
+        return hours is not None and hours[0] <= start_time < end_time <= hours[1]
+
+    def price_per_hour(self, date):
+        return self.prices.get(day_type(date))
+
+    def price_for(self, date, start_time, end_time):
+        """Total price of an interval, None when no price is set for that day type."""
+        price_per_hour = self.price_per_hour(date)
+        if price_per_hour is None:
+            return None
+        return price_for_duration(price_per_hour, date, start_time, end_time)
+
+
+def schedule_version(updated_at):
+    """Schedule version for an arena's `updated_at`."""
+    return int(updated_at.timestamp() * 1_000_000) if updated_at else 0
+
+
+def current_version(arena_id):
+    """One primary key lookup; 0 for a missing arena."""
+    return schedule_version(Arena.objects.filter(pk=arena_id).values_list("updated_at", flat=True).first())
+
+
+def build_schedule(arena_id, version=None):
+    hours = [None] * 7
+    for day, open_time, close_time in WorkingHours.objects.filter(arena_id=arena_id).values_list(
+        "day_of_week", "open_time", "close_time"
+    ):
+        hours[day] = (open_time, close_time)
+    prices = PriceTable.objects.filter(arena_id=arena_id).values_list("day_type", "price_per_hour")
+    return ArenaSchedule(arena_id, version, hours, prices)
+
+
+def get_schedule(arena_id, version=None):
+    """
+    The arena's current schedule: one version lookup once warm, none when
+    the caller passes the version of an arena it has just loaded.
+    """
+    if version is None:
+        version = current_version(arena_id)
+    with _lock:
+        schedule = _local.get(arena_id)
+        if schedule is not None and schedule.version == version:
+            _local.move_to_end(arena_id)
+            return schedule
+
+    key = SCHEDULE_KEY.format(arena_id=arena_id, version=version)
+    schedule = cache.get(key)
+    if schedule is None:
+        schedule = build_schedule(arena_id, version)
+        cache.set(key, schedule, SCHEDULE_TIMEOUT)
+
+    with _lock:
+        _local[arena_id] = schedule
+        _local.move_to_end(arena_id)
+        while len(_local) > LOCAL_SIZE:
+            _local.popitem(last=False)
+    return schedule
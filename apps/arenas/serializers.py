@@ -1,5 +1,14 @@
+from datetime import datetime, timedelta
+
+from django.core.files.storage import default_storage
 from rest_framework import serializers
-from .models import City, SportType, Arena, ArenaImage, WorkingHours, PriceTable, Review, Favorite
+from .models import City, SportType, Arena, ArenaImage, WorkingHours, PriceTable, Review, ReviewSummary, Favorite
+from .images import FORMATS
+from .reference import KINDS, get_snapshot
+from .schedule import price_for_duration
+
+QUOTE_MAX_INTERVALS = 500
+QUOTE_MAX_DAYS = 31
 
 
 class CitySerializer(serializers.ModelSerializer):
@@ -14,10 +23,63 @@ class SportTypeSerializer(serializers.ModelSerializer):
         fields = ["id", "name"]
 
 
+class ReferenceField(serializers.Field):
+    """
+    Read-only nested city/sport type taken from the reference snapshot, so
+    arena querysets do not need to join those tables.
+    """
+
+    def __init__(self, kind, **kwargs):
+        self.kind = kind
+        kwargs["read_only"] = True
+        super().__init__(**kwargs)
+
+    def get_attribute(self, instance):
+        return getattr(instance, f"{self.source}_id")
+
+    def to_representation(self, value):
+        context = self.context
+        if "reference_snapshot" not in context:
+            context["reference_snapshot"] = get_snapshot()
+        item = context["reference_snapshot"].get(self.kind, value)
+        if item is None:
+            # written after the snapshot was taken
+            item = KINDS[self.kind].objects.filter(pk=value).values("id", "name").first()
+        return item
+
+
 class ArenaImageSerializer(serializers.ModelSerializer):
+    renditions = serializers.SerializerMethodField()
+    srcset = serializers.SerializerMethodField()
+
     class Meta:
         model = ArenaImage
-        fields = ["id", "image", "is_main"]
+        fields = ["id", "image", "is_main", "width", "height", "renditions", "srcset"]
+        read_only_fields = ["width", "height"]
+
+    def _url(self, path):
+        url = default_storage.url(path)
+        request = self.context.get("request")
+        return request.build_absolute_uri(url) if request else url
+
+    def get_renditions(self, obj):
+        """{name: {width, height, webp, jpeg}} with URLs; empty until processed."""
+        return {
+            name: {
+                "width": entry["width"],
+                "height": entry["height"],
+                **{fmt: self._url(entry[fmt]) for fmt in FORMATS},
+            }
+            for name, entry in obj.renditions.items()
+        }
+
+    def get_srcset(self, obj):
+        """Ready-made `srcset` strings per format, e.g. for <picture> sources."""
+        entries = sorted(obj.renditions.values(), key=lambda entry: entry["width"])
+        return {
+            fmt: ", ".join(f"{self._url(entry[fmt])} {entry['width']}w" for entry in entries)
+            for fmt in FORMATS
+        } if entries else {}
 
 
 class WorkingHoursSerializer(serializers.ModelSerializer):
@@ -38,8 +100,8 @@ class ArenaSerializer(serializers.ModelSerializer):
     images = ArenaImageSerializer(many=True, read_only=True)
     working_hours = WorkingHoursSerializer(many=True, read_only=True)
     prices = PriceTableSerializer(many=True, read_only=True)
-    city = CitySerializer(read_only=True)
-    sport_type = SportTypeSerializer(read_only=True)
+    city = ReferenceField("cities")
+    sport_type = ReferenceField("sport_types")
     is_favorite = serializers.SerializerMethodField()
 
     class Meta:
@@ -47,17 +109,130 @@ class ArenaSerializer(serializers.ModelSerializer):
         fields = [
             "id", "name", "description", "city", "sport_type",
             "address", "latitude", "longitude", "rating",
+            "min_price_per_hour", "max_price_per_hour",
             "images", "working_hours", "prices",
             "is_favorite",
             "created_at", "updated_at"
         ]
 
     def get_is_favorite(self, obj):
+        # Arena.objects.for_listing() annotates this for the whole page at once
+        if hasattr(obj, "is_favorite"):
+            return obj.is_favorite
         user = self.context["request"].user
         if user.is_authenticated:
             return obj.favorited_by.filter(user=user).exists()
         return False
 
+class ArenaCardSerializer(serializers.ModelSerializer):
+    """Flat arena summary for lists that are cached or hit on every keystroke."""
+    city = ReferenceField("cities")
+    sport_type = ReferenceField("sport_types")
+    main_image = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Arena
+        fields = [
+            "id", "name", "city", "sport_type", "address",
+            "rating", "rating_count", "min_price_per_hour", "main_image",
+        ]
+
+    def get_main_image(self, obj):
+        # expects prefetched images; the small rendition once it exists
+        images = sorted(obj.images.all(), key=lambda image: not image.is_main)
+        if not images:
+            return None
+        thumb = images[0].renditions.get("thumb")
+        return default_storage.url(thumb["webp"]) if thumb else images[0].image.url
+
+
+class NearbyArenaSerializer(ArenaSerializer):
+    distance_km = serializers.SerializerMethodField()
+
+    class Meta(ArenaSerializer.Meta):
+        fields = ArenaSerializer.Meta.fields + ["distance_km"]
+
+    def get_distance_km(self, obj):
+        return round(obj.distance_km, 2)
+
+
+class AvailableArenaSerializer(ArenaCardSerializer):
+    """Card plus the quote for the requested interval (context: date, start_time, end_time)."""
+    price_per_hour = serializers.DecimalField(max_digits=10, decimal_places=2, read_only=True)
+    total_price = serializers.SerializerMethodField()
+
+    class Meta(ArenaCardSerializer.Meta):
+        fields = ArenaCardSerializer.Meta.fields + ["price_per_hour", "total_price"]
+
+    def get_total_price(self, obj):
+        if obj.price_per_hour is None:
+            return None
+        price = price_for_duration(
+            obj.price_per_hour, self.context["date"], self.context["start_time"], self.context["end_time"]
+        )
+        return str(price)
+
+
+class PopularQuerySerializer(serializers.Serializer):
+    city = serializers.IntegerField(required=False)
+    sport_type = serializers.IntegerField(required=False)
+
+
+class NearbyQuerySerializer(serializers.Serializer):
+    lat = serializers.FloatField(min_value=-90, max_value=90)
+    lng = serializers.FloatField(min_value=-180, max_value=180)
+    radius_km = serializers.FloatField(min_value=0.1, max_value=50, default=5)
+
+
+class AvailabilityQuerySerializer(serializers.Serializer):
+    city = serializers.IntegerField(required=False)
+    sport_type = serializers.IntegerField(required=False)
+    date = serializers.DateField()
+    start_time = serializers.TimeField()
+    end_time = serializers.TimeField(required=False)
+    duration_minutes = serializers.IntegerField(min_value=15, max_value=720, required=False)
+    max_price = serializers.DecimalField(max_digits=12, decimal_places=2, min_value=0, required=False)
+
+    def validate(self, attrs):
+        if "end_time" not in attrs:
+            if "duration_minutes" not in attrs:
+                raise serializers.ValidationError("end_time or duration_minutes is required.")
+            end = datetime.combine(attrs["date"], attrs["start_time"]) + timedelta(minutes=attrs["duration_minutes"])
+            if end.date() != attrs["date"]:
+                raise serializers.ValidationError("The interval must end on the same day.")
+            attrs["end_time"] = end.time()
+        if attrs["end_time"] <= attrs["start_time"]:
+            raise serializers.ValidationError("end_time must be after start_time.")
+        return attrs
+
+
+class QuoteIntervalSerializer(serializers.Serializer):
+    date = serializers.DateField()
+    start_time = serializers.TimeField()
+    end_time = serializers.TimeField()
+
+    def validate(self, attrs):
+        if attrs["end_time"] <= attrs["start_time"]:
+            raise serializers.ValidationError("end_time must be after start_time.")
+        return attrs
+
+
+class QuoteRequestSerializer(serializers.Serializer):
+    """Either explicit `intervals` or a `date_from`..`date_to` range cut into `slot_minutes` slots."""
+    intervals = QuoteIntervalSerializer(many=True, required=False, max_length=QUOTE_MAX_INTERVALS)
+    date_from = serializers.DateField(required=False)
+    date_to = serializers.DateField(required=False)
+    slot_minutes = serializers.IntegerField(min_value=15, max_value=720, default=60)
+
+    def validate(self, attrs):
+        if ("intervals" in attrs) == ("date_from" in attrs):
+            raise serializers.ValidationError("Send either intervals or date_from/date_to.")
+        if "date_from" in attrs:
+            attrs.setdefault("date_to", attrs["date_from"])
+            days = (attrs["date_to"] - attrs["date_from"]).days + 1
+            if not 1 <= days <= QUOTE_MAX_DAYS:
+                raise serializers.ValidationError({"date_to": f"The range must cover 1 to {QUOTE_MAX_DAYS} days."})
+        return attrs
 
 
 class ArenaCreateSerializer(serializers.ModelSerializer):
@@ -78,6 +253,26 @@ class ReviewSerializer(serializers.ModelSerializer):
         fields = ["id", "arena", "user", "rating", "comment", "created_at"]
         read_only_fields = ["user", "arena", "created_at"]
 
+class ReviewSummarySerializer(serializers.ModelSerializer):
+    count = serializers.IntegerField(source="arena.rating_count", read_only=True)
+    average = serializers.FloatField(source="arena.rating", read_only=True)
+    histogram = serializers.DictField(child=serializers.IntegerField(), read_only=True)
+    latest = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ReviewSummary
+        fields = ["count", "average", "histogram", "latest"]
+
+    def get_latest(self, summary):
+        # serialized now, so renamed users show their current username
+        if not summary.latest_ids:
+            return []
+        reviews = Review.objects.filter(pk__in=summary.latest_ids).select_related("user").in_bulk()
+        return ReviewSerializer(
+            [reviews[pk] for pk in summary.latest_ids if pk in reviews], many=True
+        ).data
+
+
 class ReviewCreateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Review
@@ -1,11 +1,142 @@
 from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
-from django.db.models import Avg
-from .models import Arena, Review
-
-@receiver([post_save, post_delete], sender=Review)
-def update_arena_rating(sender, instance, **kwargs):
-    arena = instance.arena
-    avg_rating = arena.reviews.aggregate(avg=Avg("rating"))["avg"]
-    arena.rating = avg_rating or 0
-    arena.save()
+from django.db.models import Count, F, FloatField, Max, Min, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Cast, Coalesce, NullIf
+from django.db import transaction
+from django.utils import timezone
+from .models import City, SportType, Arena, ArenaImage, WorkingHours, PriceTable, Review, ReviewSummary
+from .popularity import invalidate_popular
+from .reference import bump_version
+
+
+def apply_rating_change(arena_id, sum_delta, count_delta):
+    """
+    Shift an arena's rating totals in one atomic UPDATE. The right-hand side
+    sees the row's current values, so concurrent reviews cannot lose updates.
+    """
+    rating_sum = F("rating_sum") + sum_delta
+    rating_count = F("rating_count") + count_delta
+    Arena.objects.filter(pk=arena_id).update(
+        rating_sum=rating_sum,
+        rating_count=rating_count,
+        rating=Coalesce(Cast(rating_sum, FloatField()) / NullIf(rating_count, 0), Value(0.0)),
+    )
+
+
+def rating_totals(arena_ids):
+    """{arena_id: (rating_sum, rating_count)} aggregated from the reviews table."""
+    rows = (
+        Review.objects.filter(arena_id__in=arena_ids)
+        .order_by()
+        .values("arena_id")
+        .annotate(total=Sum("rating"), count=Count("id"))
+    )
+    return {row["arena_id"]: (row["total"], row["count"]) for row in rows}
+
+
+def star_counts(arena_ids):
+    """{arena_id: {star: count}} aggregated from the reviews table."""
+    counts = {}
+    rows = (
+        Review.objects.filter(arena_id__in=arena_ids)
+        .order_by()
+        .values_list("arena_id", "rating")
+        .annotate(count=Count("id"))
+    )
+    for arena_id, star, count in rows:
+        counts.setdefault(arena_id, {})[star] = count
+    return counts
+
+
+def refresh_review_summary(arena_id, star_deltas=None, create=True):
+    """
+    Shift the star histogram by `star_deltas` and refresh the latest review
+    ids, a LIMIT query on the (arena, created_at) index.
+    """
+    latest_ids = list(
+        Review.objects.filter(arena_id=arena_id).values_list("pk", flat=True)[:ReviewSummary.LATEST_COUNT]
+    )
+    counters = {
+        f"stars_{star}": F(f"stars_{star}") + delta
+        for star, delta in (star_deltas or {}).items() if delta
+    }
+    summary = ReviewSummary.objects.filter(arena_id=arena_id)
+    if not summary.update(latest_ids=latest_ids, updated_at=timezone.now(), **counters) and create:
+        ReviewSummary.objects.get_or_create(arena_id=arena_id)
+        summary.update(latest_ids=latest_ids, updated_at=timezone.now(), **counters)
+
+
+def rebuild_review_summaries(arena_ids):
+    """Recompute the summaries of the given arenas from scratch."""
+    counts = star_counts(arena_ids)
+    for arena_id in arena_ids:
+        stars = counts.get(arena_id, {})
+        ReviewSummary.objects.update_or_create(
+            arena_id=arena_id,
+            defaults={f"stars_{star}": stars.get(star, 0) for star in range(1, 6)},
+        )
+        refresh_review_summary(arena_id)
+
+
+@receiver(post_save, sender=Review)
+def update_arena_rating(sender, instance, created, **kwargs):
+    loaded_rating = getattr(instance, "_loaded_rating", None)
+    if created:
+        apply_rating_change(instance.arena_id, instance.rating, 1)
+        refresh_review_summary(instance.arena_id, {instance.rating: 1})
+    elif loaded_rating is not None:
+        if instance.rating != loaded_rating:
+            apply_rating_change(instance.arena_id, instance.rating - loaded_rating, 0)
+            refresh_review_summary(instance.arena_id, {loaded_rating: -1, instance.rating: 1})
+        else:
+            refresh_review_summary(instance.arena_id)
+    else:
+        # saved without being loaded first, the old value is unknown
+        total, count = rating_totals([instance.arena_id]).get(instance.arena_id, (0, 0))
+        Arena.objects.filter(pk=instance.arena_id).update(
+            rating_sum=total, rating_count=count, rating=total / count if count else 0
+        )
+        rebuild_review_summaries([instance.arena_id])
+    instance._loaded_rating = instance.rating
+
+
+@receiver(post_delete, sender=Review)
+def remove_arena_rating(sender, instance, **kwargs):
+    rating = getattr(instance, "_loaded_rating", None) or instance.rating
+    apply_rating_change(instance.arena_id, -rating, -1)
+    # never create a summary here, the arena itself may be going away
+    refresh_review_summary(instance.arena_id, {rating: -1}, create=False)
+
+
+@receiver([post_save, post_delete], sender=PriceTable)
+def update_arena_price_range(sender, instance, **kwargs):
+    prices = PriceTable.objects.filter(arena=OuterRef("pk")).values("arena")
+    Arena.objects.filter(pk=instance.arena_id).update(
+        min_price_per_hour=Subquery(prices.annotate(low=Min("price_per_hour")).values("low")),
+        max_price_per_hour=Subquery(prices.annotate(high=Max("price_per_hour")).values("high")),
+        # also the cached schedule's version
+        updated_at=timezone.now(),
+    )
+
+
+@receiver([post_save, post_delete], sender=ArenaImage)
+@receiver([post_save, post_delete], sender=WorkingHours)
+def touch_arena(sender, instance, **kwargs):
+    # nested data is part of the arena payload, so it moves the arena's validators
+    # (and, for working hours, the cached schedule's version)
+    Arena.objects.filter(pk=instance.arena_id).update(updated_at=timezone.now())
+
+
+@receiver([post_save, post_delete], sender=Arena)
+@receiver([post_save, post_delete], sender=ArenaImage)
+def arena_changed(sender, instance, **kwargs):
+    # cached rankings embed arena names, images and is_active
+    invalidate_popular()
+
+
+@receiver([post_save, post_delete], sender=City)
+@receiver([post_save, post_delete], sender=SportType)
+def reference_data_changed(sender, instance, **kwargs):
+    # in the same transaction, so the new version and the new rows show up together
+    bump_version()
+    transaction.on_commit(invalidate_popular)
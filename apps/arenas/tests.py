@@ -1,3 +1,545 @@
-from django.test import TestCase
+from datetime import date, time
+from decimal import Decimal
+from io import BytesIO, StringIO
+import shutil
+import tempfile
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from PIL import Image
+from rest_framework.test import APIClient
+
+from .models import City, SportType, Arena, ArenaImage, WorkingHours, PriceTable, Review, ReviewSummary, Favorite
+
+User = get_user_model()
+
+
+class ArenaFixturesMixin:
+    def create_arena(self, **kwargs):
+        defaults = {
+            "owner": self.owner,
+            "name": "Arena",
+            "city": self.city,
+            "sport_type": self.sport,
+            "address": "Chilonzor 1",
+        }
+        defaults.update(kwargs)
+        return Arena.objects.create(**defaults)
+
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create(username="owner", phone="+998900000001")
+        self.user = User.objects.create(username="player", phone="+998900000002")
+        self.city = City.objects.create(name="Tashkent")
+        self.sport = SportType.objects.create(name="Football")
+        self.client = APIClient()
+
+
+class ArenaListQueryCountTest(ArenaFixturesMixin, TestCase):
+    def add_arenas(self, count):
+        for i in range(count):
+            arena = self.create_arena(name=f"Arena {i}")
+            ArenaImage.objects.create(arena=arena, image="arenas/pitch.jpg")
+            WorkingHours.objects.create(arena=arena, day_of_week=0, open_time=time(8), close_time=time(23))
+            PriceTable.objects.create(arena=arena, day_type="weekday", price_per_hour=Decimal("150000"))
+            Favorite.objects.create(user=self.user, arena=arena)
+
+    def count_queries(self, url):
+        self.client.get(url)  # warm the reference data snapshot
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries)
+
+    def test_list_query_count_does_not_grow_with_arenas(self):
+        self.client.force_authenticate(self.user)
+        self.add_arenas(2)
+        small = self.count_queries("/api/arenas/")
+        self.add_arenas(8)
+        large = self.count_queries("/api/arenas/")
+        self.assertEqual(small, large)
+
+    def test_popular_query_count_does_not_grow_with_arenas(self):
+        self.add_arenas(2)
+        small = self.count_queries("/api/arenas/popular/")
+        self.add_arenas(8)
+        large = self.count_queries("/api/arenas/popular/")
+        self.assertEqual(small, large)
+
+    def test_is_favorite_is_annotated_per_user(self):
+        self.add_arenas(1)
+        other = self.create_arena(name="Other")
+
+        self.client.force_authenticate(self.user)
+        data = {a["id"]: a["is_favorite"] for a in self.client.get("/api/arenas/").json()}
+        self.assertEqual(data[other.id], False)
+        self.assertEqual(sum(data.values()), 1)
+
+
+class ArenaNearbyTest(ArenaFixturesMixin, TestCase):
+    def test_nearby_returns_arenas_within_radius_sorted_by_distance(self):
+        # three Tashkent arenas within ~10 km, an inactive one and Samarkand (~270 km)
+        center = self.create_arena(name="Center", latitude=41.3111, longitude=69.2797)
+        chilonzor = self.create_arena(name="Chilonzor", latitude=41.2756, longitude=69.2034)
+        self.create_arena(name="Yunusobod", latitude=41.3650, longitude=69.2870, is_active=False)
+        sergeli = self.create_arena(name="Sergeli", latitude=41.2265, longitude=69.2210)
+        self.create_arena(name="Samarkand", latitude=39.6542, longitude=66.9597)
+        self.create_arena(name="No coordinates")
+
+        response = self.client.get("/api/arenas/nearby/", {"lat": 41.3000, "lng": 69.2700, "radius_km": 15})
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual([a["id"] for a in data], [center.id, chilonzor.id, sergeli.id])
+        distances = [a["distance_km"] for a in data]
+        self.assertEqual(distances, sorted(distances))
+        self.assertLess(distances[-1], 15)
+
+    def test_nearby_requires_coordinates(self):
+        response = self.client.get("/api/arenas/nearby/", {"lat": 41.3})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("lng", response.json())
+
+    def test_geo_cell_follows_coordinates(self):
+        arena = self.create_arena(latitude=41.3, longitude=69.27)
+        cell = arena.geo_cell
+        arena.latitude = 39.65
+        arena.save(update_fields=["latitude"])
+        arena.refresh_from_db()
+        self.assertIsNotNone(cell)
+        self.assertNotEqual(arena.geo_cell, cell)
+
+
+class ArenaSearchTest(ArenaFixturesMixin, TestCase):
+    def search(self, terms):
+        response = self.client.get("/api/arenas/", {"search": terms})
+        self.assertEqual(response.status_code, 200)
+        return [a["name"] for a in response.json()]
+
+    def test_name_matches_rank_above_description_matches(self):
+        self.create_arena(name="Bunyodkor mini", description="Stadium near the metro")
+        self.create_arena(name="Stadium Pakhtakor", address="Olmazor 5")
+        self.create_arena(name="Tennis court")
+
+        self.assertEqual(self.search("stadium"), ["Stadium Pakhtakor", "Bunyodkor mini"])
+
+    def test_typo_in_name_still_matches(self):
+        self.create_arena(name="Pakhtakor Central")
+        self.create_arena(name="Tennis court")
+
+        self.assertEqual(self.search("Pakhtakr"), ["Pakhtakor Central"])
+
+
+class ArenaAvailabilityFilterTest(ArenaFixturesMixin, TestCase):
+    day = "2025-12-15"  # Monday
+
+    def setUp(self):
+        super().setUp()
+        from apps.bookings.models import Booking, BookingStatus
+
+        self.booked_evening = self.create_arena(name="Booked evening")
+        self.one_hour_booked = self.create_arena(name="One hour booked")
+        self.closed_monday = self.create_arena(name="Closed on Monday")
+        for arena in (self.booked_evening, self.one_hour_booked):
+            WorkingHours.objects.create(arena=arena, day_of_week=0, open_time=time(8), close_time=time(23))
+        WorkingHours.objects.create(arena=self.closed_monday, day_of_week=1, open_time=time(8), close_time=time(23))
+
+        def book(arena, start, end, status=BookingStatus.APPROVED):
+            Booking.objects.create(user=self.user, arena=arena, date=self.day,
+                                   start_time=time(start), end_time=time(end), status=status)
+
+        book(self.booked_evening, 18, 20)
+        book(self.booked_evening, 20, 22, status=BookingStatus.PENDING)
+        book(self.booked_evening, 19, 21, status=BookingStatus.CANCELED)
+        book(self.one_hour_booked, 10, 11)
+
+    def available(self, **params):
+        response = self.client.get("/api/arenas/", {"available_date": self.day, **params})
+        self.assertEqual(response.status_code, 200)
+        return {a["name"] for a in response.json()}
+
+    def test_single_booking_does_not_hide_arena_for_whole_day(self):
+        self.assertEqual(self.available(), {"Booked evening", "One hour booked"})
+
+    def test_window_must_be_free(self):
+        self.assertEqual(self.available(available_from="19:00", available_to="21:00"), {"One hour booked"})
+        self.assertEqual(self.available(available_from="10:30", available_to="11:30"), {"Booked evening"})
+
+    def test_gap_of_min_duration_inside_window(self):
+        # 17:00-18:00 and 22:00-23:00 are free at "Booked evening"
+        self.assertEqual(
+            self.available(available_from="17:00", available_to="23:00", min_duration=60),
+            {"Booked evening", "One hour booked"},
+        )
+        self.assertEqual(
+            self.available(available_from="17:00", available_to="23:00", min_duration=90),
+            {"One hour booked"},
+        )
+        # the gap right after the 10:00-11:00 booking
+        self.assertEqual(
+            self.available(available_from="09:30", available_to="13:00", min_duration=120),
+            {"Booked evening", "One hour booked"},
+        )
+        self.assertEqual(
+            self.available(available_from="09:30", available_to="12:30", min_duration=120),
+            {"Booked evening"},
+        )
+
+    def search(self, **params):
+        response = self.client.get("/api/arenas/available/", {"date": self.day, **params})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_available_search_quotes_exact_interval(self):
+        PriceTable.objects.create(arena=self.one_hour_booked, day_type="weekday", price_per_hour=Decimal("120000"))
+        PriceTable.objects.create(arena=self.booked_evening, day_type="weekday", price_per_hour=Decimal("90000"))
+
+        results = self.search(start_time="19:00", end_time="21:00", city=self.city.id)
+        self.assertEqual([(a["name"], a["total_price"]) for a in results], [("One hour booked", "240000.00")])
+
+        self.search(start_time="11:00", duration_minutes=90)
+        with self.assertNumQueries(3):  # arenas + prefetched images + reference version
+            results = self.search(start_time="11:00", duration_minutes=90)
+        self.assertEqual([(a["name"], a["total_price"]) for a in results],
+                         [("Booked evening", "135000.00"), ("One hour booked", "180000.00")])
+
+        results = self.search(start_time="11:00", duration_minutes=90, max_price="150000")
+        self.assertEqual([a["name"] for a in results], ["Booked evening"])
+        # past closing time
+        self.assertEqual(self.search(start_time="22:00", end_time="23:30"), [])
+
+    def test_max_price_compares_the_rounded_quote(self):
+        PriceTable.objects.create(arena=self.booked_evening, day_type="weekday", price_per_hour=Decimal("100000"))
+
+        results = self.search(start_time="11:00", duration_minutes=50)
+        self.assertEqual([a["total_price"] for a in results if a["name"] == "Booked evening"], ["83333.33"])
+        results = self.search(start_time="11:00", duration_minutes=50, max_price="83333.33")
+        self.assertEqual([a["name"] for a in results], ["Booked evening"])
+        self.assertEqual(self.search(start_time="11:00", duration_minutes=50, max_price="83333.32"), [])
+
+
+class ArenaPriceRangeTest(ArenaFixturesMixin, TestCase):
+    def test_price_range_follows_price_table(self):
+        arena = self.create_arena()
+        weekday = PriceTable.objects.create(arena=arena, day_type="weekday", price_per_hour=Decimal("100000"))
+        PriceTable.objects.create(arena=arena, day_type="weekend", price_per_hour=Decimal("150000"))
+        arena.refresh_from_db()
+        self.assertEqual((arena.min_price_per_hour, arena.max_price_per_hour), (Decimal("100000"), Decimal("150000")))
+
+        weekday.delete()
+        arena.refresh_from_db()
+        self.assertEqual((arena.min_price_per_hour, arena.max_price_per_hour), (Decimal("150000"), Decimal("150000")))
+
+    def test_filter_and_order_by_price(self):
+        for name, low, high in [("Cheap", 50000, 80000), ("Middle", 100000, 120000), ("Premium", 200000, 250000)]:
+            arena = self.create_arena(name=name)
+            PriceTable.objects.create(arena=arena, day_type="weekday", price_per_hour=low)
+            PriceTable.objects.create(arena=arena, day_type="weekend", price_per_hour=high)
+        self.create_arena(name="No prices")
+
+        response = self.client.get("/api/arenas/", {"min_price": 90000, "max_price": 210000, "ordering": "-min_price"})
+        self.assertEqual([a["name"] for a in response.json()], ["Premium", "Middle"])
+
+
+class ArenaRatingTest(ArenaFixturesMixin, TestCase):
+    def assertRating(self, arena, rating_sum, rating_count, rating):
+        arena.refresh_from_db()
+        self.assertEqual((arena.rating_sum, arena.rating_count), (rating_sum, rating_count))
+        self.assertAlmostEqual(arena.rating, rating)
+
+    def test_rating_follows_review_writes(self):
+        arena = self.create_arena()
+        updated_at = arena.updated_at
+        Review.objects.create(arena=arena, user=self.user, rating=5)
+        review = Review.objects.create(arena=arena, user=self.owner, rating=2)
+        self.assertRating(arena, 7, 2, 3.5)
+
+        review = Review.objects.get(pk=review.pk)
+        review.rating = 4
+        review.save()
+        self.assertRating(arena, 9, 2, 4.5)
+
+        review.delete()
+        self.assertRating(arena, 5, 1, 5.0)
+        self.assertEqual(arena.updated_at, updated_at)
+
+    def test_add_review_endpoint_updates_rating(self):
+        arena = self.create_arena()
+        self.client.force_authenticate(self.user)
+        self.client.post(f"/api/arenas/{arena.id}/add_review/", {"rating": 3})
+        self.client.post(f"/api/arenas/{arena.id}/add_review/", {"rating": 5})
+        self.assertRating(arena, 5, 1, 5.0)
+
+    def test_recompute_ratings_repairs_totals(self):
+        arena = self.create_arena()
+        Review.objects.create(arena=arena, user=self.user, rating=4)
+        Arena.objects.filter(pk=arena.pk).update(rating_sum=40, rating_count=3, rating=1)
+
+        call_command("recompute_ratings", chunk_size=1, stdout=StringIO())
+        self.assertRating(arena, 4, 1, 4.0)
+
+
+class ArenaReviewSummaryTest(ArenaFixturesMixin, TestCase):
+    def test_summary_tracks_review_writes(self):
+        arena = self.create_arena()
+        reviewers = [User.objects.create(username=f"u{i}", phone=f"+99891000000{i}") for i in range(7)]
+        for user, rating in zip(reviewers, [5, 5, 4, 3, 5, 1, 2]):
+            Review.objects.create(arena=arena, user=user, rating=rating)
+        review = Review.objects.get(arena=arena, user=reviewers[5])
+        review.rating = 4
+        review.save()
+        Review.objects.get(arena=arena, user=reviewers[6]).delete()
+
+        reviewers[4].username = "renamed"
+        reviewers[4].save()
+
+        with self.assertNumQueries(2):  # arena + summary, latest reviews
+            data = self.client.get(f"/api/arenas/{arena.id}/review_summary/").json()
+
+        self.assertEqual(data["count"], 6)
+        self.assertAlmostEqual(data["average"], 26 / 6)
+        self.assertEqual(data["histogram"], {"1": 0, "2": 0, "3": 1, "4": 2, "5": 3})
+        self.assertEqual(len(data["latest"]), ReviewSummary.LATEST_COUNT)
+        self.assertEqual(data["latest"][0]["user"], "u5")
+        self.assertEqual(data["latest"][1]["user"], "renamed")
+
+    def test_summary_of_arena_without_reviews(self):
+        arena = self.create_arena()
+        data = self.client.get(f"/api/arenas/{arena.id}/review_summary/").json()
+        self.assertEqual(data["count"], 0)
+        self.assertEqual(data["latest"], [])
+
+    def test_reviews_are_cursor_paginated(self):
+        arena = self.create_arena()
+        for i in range(3):
+            user = User.objects.create(username=f"u{i}", phone=f"+99891000000{i}")
+            Review.objects.create(arena=arena, user=user, rating=5)
+
+        first = self.client.get(f"/api/arenas/{arena.id}/reviews/", {"page_size": 2}).json()
+        second = self.client.get(first["next"]).json()
+        self.assertEqual([r["user"] for r in first["results"] + second["results"]], ["u2", "u1", "u0"])
+
+    def test_deleting_arena_with_reviews(self):
+        arena = self.create_arena()
+        Review.objects.create(arena=arena, user=self.user, rating=5)
+        arena.delete()
+        self.assertFalse(ReviewSummary.objects.exists())
+
+
+class PopularArenasTest(ArenaFixturesMixin, TestCase):
+    def test_ranking_is_segmented_and_served_from_cache(self):
+        from apps.bookings.models import Booking, BookingStatus
+
+        samarkand = City.objects.create(name="Samarkand")
+        tennis = SportType.objects.create(name="Tennis")
+        busy = self.create_arena(name="Busy")
+        liked = self.create_arena(name="Liked")
+        quiet = self.create_arena(name="Quiet")
+        court = self.create_arena(name="Court", sport_type=tennis)
+        self.create_arena(name="Registan", city=samarkand)
+        self.create_arena(name="Closed", is_active=False)
+
+        for hour in range(8, 12):
+            Booking.objects.create(user=self.user, arena=busy, date=date.today(), start_time=time(hour),
+                                   end_time=time(hour + 1), status=BookingStatus.APPROVED)
+        Favorite.objects.create(user=self.user, arena=liked)
+        call_command("compute_popularity", stdout=StringIO())
+
+        def names(**params):
+            response = self.client.get("/api/arenas/popular/", params)
+            self.assertEqual(response.status_code, 200)
+            return [a["name"] for a in response.json()]
+
+        self.assertEqual(names(city=self.city.id, sport_type=self.sport.id), ["Busy", "Liked", "Quiet"])
+        self.assertEqual(names(sport_type=tennis.id), ["Court"])
+        self.assertNotIn("Closed", names())
+        self.assertEqual(len(names()), 5)
+
+        with self.assertNumQueries(0):
+            names(sport_type=tennis.id)
+
+        court.name = "Center court"
+        court.save()
+        self.assertEqual(names(sport_type=tennis.id), ["Center court"])
+
+
+class ReferenceDataCacheTest(ArenaFixturesMixin, TestCase):
+    def test_city_list_is_served_from_snapshot_with_etag(self):
+        response = self.client.get("/api/cities/")
+        etag = response["ETag"]
+        self.assertEqual(response.json(), [{"id": self.city.id, "name": "Tashkent"}])
+
+        with self.assertNumQueries(1):  # the version row
+            response = self.client.get("/api/cities/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            City.objects.create(name="Andijan")
+        response = self.client.get("/api/cities/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual([c["name"] for c in response.json()], ["Andijan", "Tashkent"])
+
+    def test_arena_list_reads_city_and_sport_from_snapshot(self):
+        self.create_arena()
+        self.client.get("/api/arenas/")
+
+        with CaptureQueriesContext(connection) as ctx:
+            data = self.client.get("/api/arenas/").json()
+        self.assertEqual(data[0]["city"], {"id": self.city.id, "name": "Tashkent"})
+        self.assertEqual(data[0]["sport_type"], {"id": self.sport.id, "name": "Football"})
+        self.assertFalse(any("arenas_city" in q["sql"] for q in ctx.captured_queries))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.city.name = "Toshkent"
+            self.city.save()
+        self.assertEqual(self.client.get("/api/arenas/").json()[0]["city"]["name"], "Toshkent")
+
+
+class ArenaConditionalGetTest(ArenaFixturesMixin, TestCase):
+    def test_retrieve_revalidates_with_etag(self):
+        arena = self.create_arena()
+        url = f"/api/arenas/{arena.id}/"
+        etag = self.client.get(url)["ETag"]
+
+        with self.assertNumQueries(1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+        self.assertIn("Authorization", response["Vary"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.city.name = "Toshkent"
+            self.city.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["city"]["name"], "Toshkent")
+        etag = response["ETag"]
+
+        WorkingHours.objects.create(arena=arena, day_of_week=0, open_time=time(8), close_time=time(22))
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()["working_hours"]), 1)
+        etag = response["ETag"]
+
+        Review.objects.create(arena=arena, user=self.owner, rating=4)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_etag_depends_on_favorite_state(self):
+        arena = self.create_arena()
+        url = f"/api/arenas/{arena.id}/"
+        self.client.force_authenticate(self.user)
+        etag = self.client.get(url)["ETag"]
+
+        Favorite.objects.create(user=self.user, arena=arena)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()["is_favorite"])
+
+
+class ArenaImageProcessingTest(ArenaFixturesMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+        self.arena = self.create_arena(name="Photo")
+
+    def upload(self, size=(2000, 1000)):
+        buffer = BytesIO()
+        exif = Image.Exif()
+        exif[0x010F] = "Camera"
+        Image.new("RGB", size, (200, 10, 10)).save(buffer, "JPEG", exif=exif)
+        self.client.force_authenticate(self.owner)
+        response = self.client.post(
+            f"/api/arenas/{self.arena.id}/upload_image/",
+            {"image": SimpleUploadedFile("pitch.jpg", buffer.getvalue(), content_type="image/jpeg")},
+            format="multipart",
+        )
+        self.assertEqual(response.status_code, 201)
+        return ArenaImage.objects.get(pk=response.data["id"])
+
+    def test_renditions_are_scaled_and_stripped(self):
+        image = self.upload()
+        # left pending for the process_arena_images worker
+        self.assertIsNone(image.processed_at)
+        out = StringIO()
+        call_command("process_arena_images", stdout=out)
+        self.assertIn("Processed 1 images, 0 failed", out.getvalue())
+        image.refresh_from_db()
+
+        self.assertEqual((image.width, image.height), (2000, 1000))
+        self.assertIsNotNone(image.processed_at)
+        self.assertEqual((image.renditions["thumb"]["width"], image.renditions["thumb"]["height"]), (320, 160))
+        self.assertEqual(image.renditions["medium"]["width"], 1024)
+
+        with image.image.storage.open(image.renditions["thumb"]["jpeg"]) as stored:
+            self.assertEqual(len(Image.open(stored).getexif()), 0)
+
+        response = self.client.get(f"/api/arenas/{self.arena.id}/")
+        srcset = response.data["images"][0]["srcset"]
+        self.assertIn("320w", srcset["webp"])
+        self.assertIn("1024w", srcset["jpeg"])
+
+    def test_invalid_upload_is_rejected(self):
+        self.client.force_authenticate(self.owner)
+        response = self.client.post(
+            f"/api/arenas/{self.arena.id}/upload_image/",
+            {"image": SimpleUploadedFile("pitch.jpg", b"not an image", content_type="image/jpeg")},
+            format="multipart",
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(ArenaImage.objects.exists())
+
+
+class ArenaQuoteTest(ArenaFixturesMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.arena = self.create_arena(name="Quoted")
+        for day in range(6):
+            WorkingHours.objects.create(arena=self.arena, day_of_week=day, open_time=time(8), close_time=time(22))
+        PriceTable.objects.create(arena=self.arena, day_type="weekday", price_per_hour=Decimal("99999.99"))
+        PriceTable.objects.create(arena=self.arena, day_type="weekend", price_per_hour=Decimal("130000.01"))
+
+    def test_quotes_match_booking_path(self):
+        from apps.bookings.models import Booking
+
+        intervals = [
+            {"date": "2025-12-15", "start_time": "10:00", "end_time": "10:50"},
+            {"date": "2025-12-20", "start_time": "18:10", "end_time": "19:35"},
+            {"date": "2025-12-21", "start_time": "10:00", "end_time": "11:00"},
+            {"date": "2025-12-15", "start_time": "21:30", "end_time": "22:30"},
+        ]
+        url = f"/api/arenas/{self.arena.id}/quote/"
+        self.client.post(url, {"intervals": intervals}, format="json")
+        with self.assertNumQueries(1):
+            quotes = self.client.post(url, {"intervals": intervals}, format="json").data["quotes"]
+        self.assertIsNone(quotes[2]["price"])  # closed on Sunday
+        self.assertEqual((quotes[3]["open"], quotes[3]["price"]), (False, None))  # runs past closing
+
+        self.client.force_authenticate(self.user)
+        for interval, quote in zip(intervals[:2], quotes):
+            response = self.client.post("/api/bookings/", {"arena": self.arena.id, **interval})
+            self.assertEqual(response.status_code, 201)
+            stored = Booking.objects.get(pk=response.data["id"]).total_price
+            self.assertEqual(quote["price"], str(stored))
+
+    def test_range_of_slots(self):
+        response = self.client.post(
+            f"/api/arenas/{self.arena.id}/quote/",
+            {"date_from": "2025-12-20", "date_to": "2025-12-21", "slot_minutes": 120},
+            format="json",
+        )
+        quotes = response.data["quotes"]
+        self.assertEqual(len(quotes), 7)
+        self.assertEqual(quotes[0], {
+            "date": "2025-12-20", "start_time": "08:00:00", "end_time": "10:00:00",
+            "open": True, "price": "260000.02",
+        })
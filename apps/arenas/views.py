@@ -1,52 +1,130 @@
+from datetime import timedelta
+
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from django.db.models import Exists, F, OuterRef, Subquery, Value
+from django.utils.cache import patch_vary_headers
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework.filters import OrderingFilter, SearchFilter
-from .filters import ArenaFilter
+from rest_framework.filters import OrderingFilter
+from .filters import ArenaFilter, ArenaSearchFilter
+from .geo import cells_in_radius, haversine_km
+from .popularity import popular_arenas
+from .reference import get_snapshot, version_queryset as reference_version_queryset
+from .schedule import get_schedule, schedule_version
 
 
 from apps.arenas.models import (
     City, SportType, Arena, ArenaImage,
-    WorkingHours, PriceTable, Review, Favorite
+    WorkingHours, PriceTable, Review, ReviewSummary, Favorite
 )
+from apps.shared.conditional import conditional_response, make_etag, set_validators
+from apps.users.utils.custom_pagination import CreatedAtCursorPagination
 from .serializers import (
     CitySerializer, SportTypeSerializer,
     ArenaSerializer, ArenaCreateSerializer,
+    NearbyArenaSerializer, NearbyQuerySerializer, PopularQuerySerializer,
+    AvailableArenaSerializer, AvailabilityQuerySerializer, QuoteRequestSerializer,
     ArenaImageSerializer, WorkingHoursSerializer,
-    PriceTableSerializer, ReviewCreateSerializer, ReviewSerializer, FavoriteSerializer
+    PriceTableSerializer, ReviewCreateSerializer, ReviewSerializer,
+    ReviewSummarySerializer, FavoriteSerializer
 )
 
 
-class CityViewSet(viewsets.ModelViewSet):
+class ReferenceDataListMixin:
+    """
+    List straight from the reference snapshot, with a strong ETag so
+    clients revalidate with a 304 after one primary key lookup (the version).
+    """
+    reference_kind = None
+
+    def list(self, request, *args, **kwargs):
+        snapshot = get_snapshot()
+        etag = snapshot.etags[self.reference_kind]
+        response = conditional_response(request, etag=etag)
+        if response is not None:
+            return response
+
+        return set_validators(Response(snapshot.data[self.reference_kind]), etag)
+
+
+class CityViewSet(ReferenceDataListMixin, viewsets.ModelViewSet):
     queryset = City.objects.all()
     serializer_class = CitySerializer
     permission_classes = [permissions.AllowAny]
+    reference_kind = "cities"
 
 
-class SportTypeViewSet(viewsets.ModelViewSet):
+class SportTypeViewSet(ReferenceDataListMixin, viewsets.ModelViewSet):
     queryset = SportType.objects.all()
     serializer_class = SportTypeSerializer
     permission_classes = [permissions.AllowAny]
+    reference_kind = "sport_types"
 
 
 class ArenaViewSet(viewsets.ModelViewSet):
     queryset = Arena.objects.all().select_related("city", "sport_type")
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
 
-    filter_backends = [DjangoFilterBackend, OrderingFilter, SearchFilter]
+    filter_backends = [DjangoFilterBackend, OrderingFilter, ArenaSearchFilter]
     filterset_class = ArenaFilter
-    search_fields = ["name", "description", "address"]
-    ordering_fields = ["rating", "created_at"]
+    ordering_fields = ["rating", "created_at", "min_price", "max_price"]
+    lookup_value_regex = r"\d+"
+    nearby_limit = 50
+    available_limit = 50
+
+    def get_queryset(self):
+        if self.action in ["list", "retrieve", "nearby"]:
+            return Arena.objects.for_listing(self.request.user).alias(
+                min_price=F("min_price_per_hour"),
+                max_price=F("max_price_per_hour"),
+            )
+        if self.action == "review_summary":
+            return Arena.objects.select_related("review_summary")
+        return Arena.objects.all()
 
     def get_serializer_class(self):
         if self.action in ["create", "update", "partial_update"]:
             return ArenaCreateSerializer
+        if self.action == "nearby":
+            return NearbyArenaSerializer
         return ArenaSerializer
 
     def perform_create(self, serializer):
         serializer.save(owner=self.request.user)
 
+    def retrieve(self, request, *args, **kwargs):
+        """
+        Conditional GET: the ETag comes from a single primary key lookup of
+        everything the payload depends on, so a revalidation that still
+        matches returns 304 without loading the arena.
+        """
+        etag = self.get_detail_etag(kwargs[self.lookup_field])
+        response = conditional_response(request, etag=etag) if etag is not None else None
+        if response is None:
+            response = set_validators(super().retrieve(request, *args, **kwargs), etag)
+        # the ETag depends on the caller (is_favorite), on 304s as well
+        patch_vary_headers(response, ["Authorization"])
+        return response
+
+    def get_detail_etag(self, pk):
+        user = self.request.user
+        if user.is_authenticated:
+            is_favorite = Exists(Favorite.objects.filter(arena=OuterRef("pk"), user=user))
+        else:
+            is_favorite = Value(False)
+        # updated_at also moves with images, working hours and prices; city and
+        # sport type names come from the reference snapshot
+        stamp = (
+            Arena.objects.filter(pk=pk)
+            .annotate(is_favorite=is_favorite, reference_version=Subquery(reference_version_queryset()))
+            .values_list("updated_at", "rating_sum", "rating_count", "is_favorite", "reference_version")
+            .first()
+        )
+        if stamp is None:
+            return None
+        return make_etag("arena", pk, *stamp)
+
     @action(detail=True, methods=["post"], permission_classes=[permissions.IsAuthenticated])
     def add_review(self, request, pk=None):
         arena = self.get_object()
@@ -69,9 +147,24 @@ class ArenaViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=["get"])
     def reviews(self, request, pk=None):
         arena = self.get_object()
-        reviews = arena.reviews.all()
-        data = ReviewSerializer(reviews, many=True).data
-        return Response(data)
+        reviews = arena.reviews.select_related("user")
+        paginator = CreatedAtCursorPagination()
+        page = paginator.paginate_queryset(reviews, request, view=self)
+        data = ReviewSerializer(page, many=True).data
+        return paginator.get_paginated_response(data)
+
+    @action(detail=True, methods=["get"])
+    def review_summary(self, request, pk=None):
+        """
+        Review count, average, 1–5 star histogram and the latest reviews,
+        read from the precomputed ReviewSummary row.
+        """
+        arena = self.get_object()
+        try:
+            summary = arena.review_summary
+        except ReviewSummary.DoesNotExist:
+            summary = ReviewSummary(arena=arena)
+        return Response(ReviewSummarySerializer(summary).data)
 
     @action(detail=True, methods=["post"], permission_classes=[permissions.IsAuthenticated])
     def favorite(self, request, pk=None):
@@ -94,14 +187,18 @@ class ArenaViewSet(viewsets.ModelViewSet):
 
     @action(detail=True, methods=["post"], permission_classes=[permissions.IsAuthenticated])
     def upload_image(self, request, pk=None):
+        """
+        Stores the original; thumbnails and WebP/JPEG renditions are made in
+        the background and show up in `renditions`/`srcset` shortly after.
+        """
         arena = self.get_object()
-        image = request.FILES.get("image")
+        serializer = ArenaImageSerializer(data=request.data, context=self.get_serializer_context())
 
-        if not image:
-            return Response({"error": "Image is required"}, status=400)
+        if serializer.is_valid():
+            serializer.save(arena=arena)
+            return Response(serializer.data, status=201)
 
-        img = ArenaImage.objects.create(arena=arena, image=image)
-        return Response(ArenaImageSerializer(img).data, status=201)
+        return Response(serializer.errors, status=400)
 
     @action(detail=True, methods=["post"], permission_classes=[permissions.IsAuthenticated])
     def add_working_hours(self, request, pk=None):
@@ -127,6 +224,115 @@ class ArenaViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=["get"])
     def popular(self, request):
-        arenas = Arena.objects.order_by("-rating")[:10]
-        data = ArenaSerializer(arenas, many=True).data
-        return Response(data)
\ No newline at end of file
+        """
+        Precomputed ranking (see `compute_popularity`), optionally per
+        `city` and/or `sport_type`, served from cache.
+        """
+        params = PopularQuerySerializer(data=request.query_params)
+        if not params.is_valid():
+            return Response(params.errors, status=400)
+
+        data = popular_arenas(
+            params.validated_data.get("city"),
+            params.validated_data.get("sport_type"),
+        )
+        return Response(data)
+
+    @action(detail=False, methods=["get"])
+    def nearby(self, request):
+        """
+        Active arenas within `radius_km` of (`lat`, `lng`), nearest first.
+        The indexed grid cell narrows the candidates to the bounding box,
+        haversine distance is then only computed for those rows.
+        """
+        params = NearbyQuerySerializer(data=request.query_params)
+        if not params.is_valid():
+            return Response(params.errors, status=400)
+
+        lat = params.validated_data["lat"]
+        lng = params.validated_data["lng"]
+        radius_km = params.validated_data["radius_km"]
+
+        arenas = (
+            self.filter_queryset(self.get_queryset())
+            .filter(is_active=True, geo_cell__in=cells_in_radius(lat, lng, radius_km))
+            .annotate(distance_km=haversine_km(lat, lng))
+            .filter(distance_km__lte=radius_km)
+            .order_by("distance_km")[:self.nearby_limit]
+        )
+        data = self.get_serializer(arenas, many=True).data
+        return Response(data)
+
+    @action(detail=False, methods=["get"])
+    def available(self, request):
+        """
+        Active arenas (optionally in `city` / of `sport_type`) that can host
+        exactly `start_time`..`end_time` (or `duration_minutes`) on `date`,
+        cheapest first, each with its quote; `max_price` caps the quote.
+        """
+        from apps.bookings.services import arenas_free_for
+
+        params = AvailabilityQuerySerializer(data=request.query_params)
+        if not params.is_valid():
+            return Response(params.errors, status=400)
+        query = params.validated_data
+
+        arenas = Arena.objects.filter(is_active=True).prefetch_related("images")
+        if "city" in query:
+            arenas = arenas.filter(city_id=query["city"])
+        if "sport_type" in query:
+            arenas = arenas.filter(sport_type_id=query["sport_type"])
+
+        arenas = arenas_free_for(
+            arenas, query["date"], query["start_time"], query["end_time"], query.get("max_price")
+        ).order_by(F("price_per_hour").asc(nulls_last=True), "-rating", "id")[:self.available_limit]
+
+        context = {**self.get_serializer_context(), **query}
+        data = AvailableArenaSerializer(arenas, many=True, context=context).data
+        return Response(data)
+
+    @action(detail=True, methods=["post"], permission_classes=[permissions.AllowAny])
+    def quote(self, request, pk=None):
+        """
+        Prices for many candidate intervals at once: either `intervals`
+        ([{date, start_time, end_time}, ...]) or every `slot_minutes` slot of
+        the opening hours between `date_from` and `date_to`. Prices come
+        from the cached arena schedule and match what a booking would store;
+        `price` is null where the arena is closed or has no price.
+        """
+        from apps.bookings.services import generate_time_slots
+
+        params = QuoteRequestSerializer(data=request.data)
+        if not params.is_valid():
+            return Response(params.errors, status=400)
+        query = params.validated_data
+
+        arena = self.get_object()
+        arena_id = arena.pk
+        schedule = get_schedule(arena_id, schedule_version(arena.updated_at))
+
+        if "intervals" in query:
+            intervals = [(item["date"], item["start_time"], item["end_time"]) for item in query["intervals"]]
+        else:
+            intervals = []
+            day = query["date_from"]
+            while day <= query["date_to"]:
+                hours = schedule.hours_for(day)
+                if hours:
+                    intervals.extend(
+                        (day, start, end) for start, end in generate_time_slots(*hours, query["slot_minutes"])
+                    )
+                day += timedelta(days=1)
+
+        quotes = []
+        for day, start, end in intervals:
+            is_open = schedule.is_open(day, start, end)
+            price = schedule.price_for(day, start, end) if is_open else None
+            quotes.append({
+                "date": str(day),
+                "start_time": str(start),
+                "end_time": str(end),
+                "open": is_open,
+                "price": str(price) if price is not None else None,
+            })
+        return Response({"arena": arena_id, "quotes": quotes})
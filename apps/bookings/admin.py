@@ -1,9 +1,23 @@
 # apps/bookings/admin.py
 from django.contrib import admin
-from .models import Booking
+from .models import Booking, BookingSeries, WaitlistEntry
 
 @admin.register(Booking)
 class BookingAdmin(admin.ModelAdmin):
     list_display = ("id", "user", "arena", "date", "start_time", "end_time", "status", "total_price")
     list_filter = ("status", "arena", "date")
     search_fields = ("user__username", "arena__name")
+
+
+@admin.register(BookingSeries)
+class BookingSeriesAdmin(admin.ModelAdmin):
+    list_display = ("id", "user", "arena", "weekday", "start_time", "end_time", "start_date", "end_date")
+    list_filter = ("weekday", "arena")
+    search_fields = ("user__username", "arena__name")
+
+
+@admin.register(WaitlistEntry)
+class WaitlistEntryAdmin(admin.ModelAdmin):
+    list_display = ("id", "user", "arena", "date", "start_time", "end_time", "duration_minutes", "status")
+    list_filter = ("status", "arena", "date")
+    search_fields = ("user__username", "arena__name")
@@ -0,0 +1,32 @@
+# apps/bookings/management/commands/complete_past_bookings.py
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.bookings.services import complete_past_bookings
+from apps.bookings.waitlist import expire_waitlist_entries
+
+
+class Command(BaseCommand):
+    help = (
+        "Mark approved bookings that have already ended as completed and expire "
+        "waitlist entries for past times (safe to run on several nodes)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument(
+            "--interval", type=int, default=0,
+            help="Keep running and sweep every N seconds (0 = sweep once and exit)",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            completed, batches = complete_past_bookings(batch_size=options["batch_size"])
+            expired = expire_waitlist_entries(batch_size=options["batch_size"])
+            if completed or expired or not options["interval"]:
+                self.stdout.write(self.style.SUCCESS(f"Completed {completed} bookings in {batches} batches"))
+                self.stdout.write(self.style.SUCCESS(f"Expired {expired} waitlist entries"))
+            if not options["interval"]:
+                break
+            time.sleep(options["interval"])
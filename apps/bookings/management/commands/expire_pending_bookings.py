@@ -0,0 +1,26 @@
+# apps/bookings/management/commands/expire_pending_bookings.py
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.bookings.services import expire_pending_bookings
+
+
+class Command(BaseCommand):
+    help = "Cancel pending checkout holds whose hold_expires_at has passed"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument(
+            "--interval", type=int, default=0,
+            help="Keep running and sweep every N seconds (0 = sweep once and exit)",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            expired = expire_pending_bookings(batch_size=options["batch_size"])
+            if expired or not options["interval"]:
+                self.stdout.write(self.style.SUCCESS(f"Expired {expired} pending bookings"))
+            if not options["interval"]:
+                break
+            time.sleep(options["interval"])
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.7 on 2026-10-18 09:35
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('arenas', '0005_arena_search'),
+        ('bookings', '0002_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['arena', 'date', 'status'], name='booking_arena_date_status_idx'),
+        ),
+    ]
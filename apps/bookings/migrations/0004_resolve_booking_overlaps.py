@@ -0,0 +1,60 @@
+from django.contrib.postgres.operations import BtreeGistExtension
+from django.db import migrations
+from django.db.models import F
+
+
+def check_overlapping_bookings(apps, schema_editor):
+    """
+    The exclusion constraint cannot be added while active bookings overlap,
+    and which customer keeps the slot is not ours to decide here. Stop with
+    every conflicting id instead, so an operator can cancel or move them
+    (through the API or admin, which notify the users) and migrate again.
+    Active bookings ending before they start cannot be expressed as a range
+    and are listed too.
+    """
+    Booking = apps.get_model("bookings", "Booking")
+    active = Booking.objects.filter(status__in=["pending", "approved"])
+
+    inverted = list(active.filter(start_time__gt=F("end_time")).values_list("pk", flat=True))
+    rows = (
+        active.exclude(pk__in=inverted)
+        .order_by("arena_id", "date", "start_time", "pk")
+        .values_list("pk", "arena_id", "date", "start_time", "end_time")
+    )
+    conflicts = []
+    day, group, group_end = None, [], None
+    for pk, arena_id, date, start_time, end_time in rows.iterator(chunk_size=2000):
+        # sorted by start, so a booking overlaps the group iff it starts before the group ends
+        if (arena_id, date) != day or start_time >= group_end:
+            if len(group) > 1:
+                conflicts.append((day, group))
+            day, group, group_end = (arena_id, date), [], end_time
+        group.append(pk)
+        group_end = max(group_end, end_time)
+    if len(group) > 1:
+        conflicts.append((day, group))
+
+    if not conflicts and not inverted:
+        return
+    lines = [
+        f"arena {arena_id}, {date}: bookings {', '.join(map(str, pks))}"
+        for (arena_id, date), pks in conflicts
+    ]
+    if inverted:
+        lines.append(f"ending before they start: bookings {', '.join(map(str, inverted))}")
+    raise RuntimeError(
+        "Active bookings overlap, so the booking_no_overlap constraint cannot be added. "
+        "Cancel or move these bookings and run the migration again:\n" + "\n".join(lines)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0003_booking_arena_date_status_idx'),
+    ]
+
+    operations = [
+        BtreeGistExtension(),
+        migrations.RunPython(check_overlapping_bookings, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-18 09:46
+
+import apps.bookings.models
+import django.contrib.postgres.constraints
+import django.db.models.expressions
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('arenas', '0011_arena_image_renditions'),
+        ('bookings', '0004_resolve_booking_overlaps'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='booking',
+            constraint=django.contrib.postgres.constraints.ExclusionConstraint(condition=models.Q(('status__in', ['pending', 'approved'])), expressions=[('arena', '='), (apps.bookings.models.TsRange(models.ExpressionWrapper(django.db.models.expressions.CombinedExpression(models.F('date'), '+', models.F('start_time')), output_field=models.DateTimeField()), models.ExpressionWrapper(django.db.models.expressions.CombinedExpression(models.F('date'), '+', models.F('end_time')), output_field=models.DateTimeField()), models.Value('[)')), '&&')], name='booking_no_overlap'),
+        ),
+    ]
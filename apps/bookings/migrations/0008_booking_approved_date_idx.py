@@ -0,0 +1,20 @@
+# Generated by Django 5.2.7 on 2026-10-18 09:55
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('arenas', '0011_arena_image_renditions'),
+        ('bookings', '0007_booking_pending_created_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(condition=models.Q(('status', 'approved')), fields=['date', 'id'], name='booking_approved_date_idx'),
+        ),
+    ]
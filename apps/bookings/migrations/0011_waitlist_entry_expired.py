@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 10:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0010_booking_hold_expires_at'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='waitlistentry',
+            name='status',
+            field=models.CharField(choices=[('waiting', 'Waiting'), ('notified', 'Notified'), ('expired', 'Expired')], default='waiting', max_length=20),
+        ),
+    ]
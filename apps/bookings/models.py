@@ -1,10 +1,10 @@
-from decimal import Decimal
-
 from django.db import models
 from django.conf import settings
+from django.contrib.postgres.constraints import ExclusionConstraint
+from django.contrib.postgres.fields import DateTimeRangeField, RangeOperators
 from django.core.exceptions import ValidationError
-from apps.arenas.models import Arena
-from datetime import datetime, time
+from apps.arenas.models import Arena, WEEKDAY_CHOICES
+from apps.arenas.schedule import get_schedule
 
 
 class BookingStatus(models.TextChoices):
@@ -15,6 +15,51 @@ class BookingStatus(models.TextChoices):
     COMPLETED = "completed", "Completed"
 
 
+# bookings in these statuses hold their time slot
+ACTIVE_BOOKING_STATUSES = [BookingStatus.PENDING, BookingStatus.APPROVED]
+
+OVERLAP_CONSTRAINT = "booking_no_overlap"
+
+
+class TsRange(models.Func):
+    function = "TSRANGE"
+    output_field = DateTimeRangeField()
+
+
+def booking_period():
+    """[date + start_time, date + end_time) as a timestamp range."""
+    return TsRange(
+        models.ExpressionWrapper(models.F("date") + models.F("start_time"), output_field=models.DateTimeField()),
+        models.ExpressionWrapper(models.F("date") + models.F("end_time"), output_field=models.DateTimeField()),
+        models.Value("[)"),
+    )
+
+
+class BookingSeries(models.Model):
+    """A weekly rule; its occurrences are ordinary bookings pointing back here."""
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="booking_series"
+    )
+    arena = models.ForeignKey(
+        Arena,
+        on_delete=models.CASCADE,
+        related_name="booking_series"
+    )
+
+    weekday = models.IntegerField(choices=WEEKDAY_CHOICES)
+    start_time = models.TimeField()
+    end_time = models.TimeField()
+    start_date = models.DateField()
+    end_date = models.DateField()
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.arena} — {self.get_weekday_display()} {self.start_time}-{self.end_time}"
+
+
 class Booking(models.Model):
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -38,53 +83,139 @@ class Booking(models.Model):
     )
 
     total_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    series = models.ForeignKey(
+        BookingSeries,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="occurrences"
+    )
+    # set only for checkout holds; expire_pending_bookings cancels them once passed
+    hold_expires_at = models.DateTimeField(null=True, blank=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["arena", "date", "status"], name="booking_arena_date_status_idx"),
+            # only pending holds are indexed, so the hold sweeper never scans history
+            # or bookings that are simply awaiting approval
+            models.Index(
+                fields=["hold_expires_at"],
+                name="booking_pending_hold_idx",
+                condition=models.Q(status=BookingStatus.PENDING, hold_expires_at__isnull=False),
+            ),
+            # keyset order for complete_past_bookings over approved rows only
+            models.Index(
+                fields=["date", "id"],
+                name="booking_approved_date_idx",
+                condition=models.Q(status=BookingStatus.APPROVED),
+            ),
+        ]
+        constraints = [
+            # active bookings of one arena can never overlap, whatever the
+            # concurrency; violations surface as IntegrityError (-> 409)
+            ExclusionConstraint(
+                name=OVERLAP_CONSTRAINT,
+                expressions=[
+                    ("arena", RangeOperators.EQUAL),
+                    (booking_period(), RangeOperators.OVERLAPS),
+                ],
+                condition=models.Q(status__in=ACTIVE_BOOKING_STATUSES),
+            ),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # the stored status, so signals can tell a real status change from a plain save
+        instance._loaded_status = instance.__dict__.get("status")
+        return instance
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        # post_save receivers have seen the change; later saves compare against this
+        self._loaded_status = self.status
+
     # --- VALIDATION ---- #
 
     def clean(self):
+        self.clean_schedule()
+
+        # boshqa bronlar bilan to‘qnashmasligi kerak
+        from .occupancy import get_occupancy
+        if not get_occupancy(self.arena_id, self.date).is_free(self.start_time, self.end_time, exclude=self.id):
+            raise ValidationError("Bu vaqt allaqachon band qilingan.")
+
+    def clean_schedule(self, schedule=None):
+        """
+        Checks that need no other bookings; overlaps are left to the database.
+        Pass `schedule` when the caller already has the arena's schedule.
+        """
         # vaqt to‘g‘ri kelishi kerak
         if self.start_time >= self.end_time:
             raise ValidationError("Boshlanish vaqti tugash vaqtidan oldin bo‘lishi shart.")
 
         # arena ishlaydigan vaqt ichida bo‘lishi kerak
-        weekday = self.date.weekday()
-        working_hours = self.arena.working_hours.filter(day_of_week=weekday).first()
+        schedule = schedule or get_schedule(self.arena_id)
 
-        if not working_hours:
+        if schedule.hours_for(self.date) is None:
             raise ValidationError("Bu kunda arena ishlamaydi.")
 
-        if not (working_hours.open_time <= self.start_time < working_hours.close_time):
+        if not schedule.is_open(self.date, self.start_time, self.end_time):
             raise ValidationError("Arena bu vaqtda ishlamaydi.")
 
-        # boshqa bronlar bilan to‘qnashmasligi kerak
-        overlapping = Booking.objects.filter(
-            arena=self.arena,
-            date=self.date,
-            status__in=[BookingStatus.APPROVED, BookingStatus.PENDING]
-        ).exclude(id=self.id).filter(
-            start_time__lt=self.end_time,
-            end_time__gt=self.start_time
-        )
-
-        if overlapping.exists():
-            raise ValidationError("Bu vaqt allaqachon band qilingan.")
-
     # narx hisoblash
     def calculate_price(self):
-        weekday = self.date.weekday()
-        day_type = "weekday" if weekday < 5 else "weekend"
-
-        price = self.arena.prices.filter(day_type=day_type).first()
-        if price:
-            # davomiylikni hisoblash
-            duration = (
-                    datetime.combine(self.date, self.end_time) -
-                    datetime.combine(self.date, self.start_time)
-            )
-
-            # float emas, Decimal bo‘lishi shart!
-            hours = Decimal(duration.total_seconds()) / Decimal(3600)
-
-            # narxni hisoblash (Decimal * Decimal)
-            self.total_price = price.price_per_hour * hours
+        # Decimal arifmetikasi apps.arenas.schedule.price_for_duration da
+        price = get_schedule(self.arena_id).price_for(self.date, self.start_time, self.end_time)
+        if price is not None:
+            self.total_price = price
+
+
+class WaitlistStatus(models.TextChoices):
+    WAITING = "waiting", "Waiting"
+    NOTIFIED = "notified", "Notified"
+    EXPIRED = "expired", "Expired"
+
+
+class WaitlistEntry(models.Model):
+    """
+    A user waiting for `duration_minutes` (default: the whole window) of
+    free time between start_time and end_time on an arena's date.
+    """
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="waitlist_entries"
+    )
+    arena = models.ForeignKey(
+        Arena,
+        on_delete=models.CASCADE,
+        related_name="waitlist_entries"
+    )
+
+    date = models.DateField()
+    start_time = models.TimeField()
+    end_time = models.TimeField()
+    duration_minutes = models.PositiveIntegerField(null=True, blank=True)
+
+    status = models.CharField(
+        max_length=20,
+        choices=WaitlistStatus.choices,
+        default=WaitlistStatus.WAITING
+    )
+    notified_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # released slots are matched against waiting entries of one arena-day
+            models.Index(
+                fields=["arena", "date"],
+                name="waitlist_waiting_idx",
+                condition=models.Q(status=WaitlistStatus.WAITING),
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.user} — {self.arena} {self.date} {self.start_time}-{self.end_time}"
@@ -0,0 +1,132 @@
+"""
+In-memory occupancy index: which parts of an arena's day are taken by
+active bookings.
+
+Each arena-day is a bitmap of CELL_MINUTES cells (bit i set = some active
+booking overlaps cell i) plus the exact booking intervals. A range whose
+cells are all clear is free without looking further; only when a cell is
+shared with a booking that may merely touch the range are the intervals
+compared. Days are built lazily, one query per batch of missing days, and
+kept in a bounded LRU. The version is a per-arena counter in the shared
+cache that bookings_changed() bumps after commit, which retires every
+process's cached days of that arena without writing to the arena row.
+"""
+import threading
+from collections import OrderedDict
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.utils import timezone
+
+from .models import Booking, ACTIVE_BOOKING_STATUSES
+
+CELL_MINUTES = 15
+CELL_SECONDS = CELL_MINUTES * 60
+
+VERSION_KEY = "occupancy:version:{arena_id}"
+LOCAL_SIZE = 4096
+
+_local = OrderedDict()
+_lock = threading.Lock()
+
+
+def _seconds(value):
+    return value.hour * 3600 + value.minute * 60 + value.second
+
+
+def cell_mask(start_time, end_time):
+    """Bits of every cell that [start_time, end_time) touches."""
+    first = _seconds(start_time) // CELL_SECONDS
+    last = -(-_seconds(end_time) // CELL_SECONDS)
+    if last <= first:
+        return 0
+    return ((1 << (last - first)) - 1) << first
+
+
+class DayOccupancy:
+    __slots__ = ("day", "bits", "intervals")
+
+    def __init__(self, day, intervals):
+        # intervals: (start_time, end_time, booking_id) ordered by start_time
+        bits = 0
+        for start_time, end_time, _ in intervals:
+            bits |= cell_mask(start_time, end_time)
+        self.day = day
+        self.bits = bits
+        self.intervals = tuple(intervals)
+
+    def is_free(self, start_time, end_time, exclude=None):
+        """True if no active booking (other than `exclude`) overlaps the range."""
+        if not self.bits & cell_mask(start_time, end_time):
+            return True
+        return not any(
+            start < end_time and end > start_time
+            for start, end, booking_id in self.intervals
+            if booking_id != exclude
+        )
+
+    def free_slots(self, slots):
+        """The (start_time, end_time) slots that are entirely free."""
+        return [slot for slot in slots if self.is_free(*slot)]
+
+
+def current_version(arena_id):
+    key = VERSION_KEY.format(arena_id=arena_id)
+    version = cache.get(key)
+    if version is None:
+        # start from the clock so a lost counter never repeats a version
+        cache.add(key, int(timezone.now().timestamp() * 1_000_000), None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(arena_id):
+    try:
+        cache.incr(VERSION_KEY.format(arena_id=arena_id))
+    except ValueError:
+        current_version(arena_id)
+
+
+def get_occupancy_range(arena_id, date_from, date_to, version=None):
+    """
+    {day: DayOccupancy} for [date_from, date_to]: at most one bookings query,
+    for the days missing from the LRU.
+    """
+    if version is None:
+        version = current_version(arena_id)
+    days = [date_from + timedelta(days=offset) for offset in range((date_to - date_from).days + 1)]
+
+    result = {}
+    with _lock:
+        for day in days:
+            entry = _local.get((arena_id, day))
+            if entry is not None and entry[0] == version:
+                _local.move_to_end((arena_id, day))
+                result[day] = entry[1]
+
+    missing = [day for day in days if day not in result]
+    if not missing:
+        return result
+
+    intervals = {day: [] for day in missing}
+    rows = Booking.objects.filter(
+        arena_id=arena_id,
+        date__range=(missing[0], missing[-1]),
+        status__in=ACTIVE_BOOKING_STATUSES,
+    ).order_by("date", "start_time").values_list("date", "start_time", "end_time", "id")
+    for day, start_time, end_time, booking_id in rows:
+        if day in intervals:
+            intervals[day].append((start_time, end_time, booking_id))
+
+    with _lock:
+        for day in missing:
+            occupancy = result[day] = DayOccupancy(day, intervals[day])
+            _local[(arena_id, day)] = (version, occupancy)
+            _local.move_to_end((arena_id, day))
+        while len(_local) > LOCAL_SIZE:
+            _local.popitem(last=False)
+    return result
+
+
+def get_occupancy(arena_id, day, version=None):
+    return get_occupancy_range(arena_id, day, day, version)[day]
@@ -1,5 +1,12 @@
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.utils import timezone
 from rest_framework import serializers
-from .models import Booking
+from apps.arenas.schedule import get_schedule, schedule_version
+from .models import Booking, BookingSeries, WaitlistEntry
+from .services import (
+    BULK_TRANSITION_LIMIT, CALENDAR_MAX_DAYS, FREE_SLOTS_MAX_DAYS, SERIES_MAX_OCCURRENCES, TRANSITIONS,
+    create_booking_atomic, create_booking_series, series_dates,
+)
 
 
 class BookingSerializer(serializers.ModelSerializer):
@@ -10,17 +17,133 @@ class BookingSerializer(serializers.ModelSerializer):
         fields = [
             "id", "user", "arena", "arena_name",
             "date", "start_time", "end_time",
-            "status", "total_price", "created_at"
+            "status", "total_price", "hold_expires_at", "created_at"
         ]
         read_only_fields = ["status", "user", "total_price"]
 
 
 class BookingCreateSerializer(serializers.ModelSerializer):
+    # checkout hold: cancelled after BOOKING_HOLD_MINUTES unless approved (e.g. paid) first
+    hold = serializers.BooleanField(write_only=True, required=False, default=False)
+
+    class Meta:
+        model = Booking
+        fields = ["id", "arena", "date", "start_time", "end_time", "hold", "status", "total_price", "hold_expires_at"]
+        read_only_fields = ["status", "total_price", "hold_expires_at"]
+
+    def validate(self, attrs):
+        booking = Booking(**{key: value for key, value in attrs.items() if key != "hold"})
+        try:
+            booking.clean_schedule()
+        except DjangoValidationError as error:
+            raise serializers.ValidationError({"error": error.messages[0]})
+        booking.calculate_price()
+        attrs["total_price"] = booking.total_price
+        return attrs
+
+    def create(self, validated_data):
+        # overlaps are rejected by the database constraint (409)
+        user = self.context["request"].user
+        return create_booking_atomic(user=user, **validated_data)
+
+
+class SeriesOccurrenceSerializer(serializers.ModelSerializer):
     class Meta:
         model = Booking
-        fields = ["arena", "date", "start_time", "end_time"]
+        fields = ["id", "date", "status", "total_price"]
+
+
+class BookingSeriesSerializer(serializers.ModelSerializer):
+    occurrences = SeriesOccurrenceSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = BookingSeries
+        fields = [
+            "id", "user", "arena", "weekday", "start_time", "end_time",
+            "start_date", "end_date", "occurrences", "created_at",
+        ]
+        read_only_fields = ["user"]
+
+    def validate(self, attrs):
+        if attrs["end_date"] < attrs["start_date"]:
+            raise serializers.ValidationError({"error": "end_date start_date dan oldin bo'lishi mumkin emas."})
+
+        dates = series_dates(attrs["weekday"], attrs["start_date"], attrs["end_date"])
+        if not dates:
+            raise serializers.ValidationError({"error": "Bu oraliqda tanlangan hafta kuni yo'q."})
+        if len(dates) > SERIES_MAX_OCCURRENCES:
+            raise serializers.ValidationError({"error": f"Ko'pi bilan {SERIES_MAX_OCCURRENCES} ta bron."})
+
+        # every occurrence falls on the same weekday, so one check covers all
+        arena = attrs["arena"]
+        booking = Booking(
+            arena=arena, date=dates[0],
+            start_time=attrs["start_time"], end_time=attrs["end_time"],
+        )
+        try:
+            booking.clean_schedule(get_schedule(arena.pk, schedule_version(arena.updated_at)))
+        except DjangoValidationError as error:
+            raise serializers.ValidationError({"error": error.messages[0]})
+        return attrs
 
     def create(self, validated_data):
         user = self.context["request"].user
-        booking = Booking.objects.create(user=user, **validated_data)
-        return booking
\ No newline at end of file
+        return create_booking_series(user=user, **validated_data)
+
+
+class BulkTransitionSerializer(serializers.Serializer):
+    action = serializers.ChoiceField(choices=list(TRANSITIONS))
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        min_length=1,
+        max_length=BULK_TRANSITION_LIMIT,
+    )
+
+
+class WaitlistEntrySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = WaitlistEntry
+        fields = [
+            "id", "arena", "date", "start_time", "end_time", "duration_minutes",
+            "status", "notified_at", "created_at",
+        ]
+        read_only_fields = ["status", "notified_at"]
+        extra_kwargs = {"duration_minutes": {"min_value": 15}}
+
+    def validate(self, attrs):
+        if attrs["end_time"] <= attrs["start_time"]:
+            raise serializers.ValidationError({"error": "end_time start_time dan katta bo'lishi kerak."})
+        if attrs["date"] < timezone.localdate():
+            raise serializers.ValidationError({"error": "O'tgan sana uchun navbatga yozilib bo'lmaydi."})
+
+        window = (
+            attrs["end_time"].hour * 60 + attrs["end_time"].minute
+            - attrs["start_time"].hour * 60 - attrs["start_time"].minute
+        )
+        if attrs.get("duration_minutes") and attrs["duration_minutes"] > window:
+            raise serializers.ValidationError({"error": "duration_minutes oraliqdan uzun."})
+        return attrs
+
+
+class DateWindowQuerySerializer(serializers.Serializer):
+    max_days = FREE_SLOTS_MAX_DAYS
+
+    date_from = serializers.DateField()
+    date_to = serializers.DateField(required=False)
+
+    def validate(self, attrs):
+        attrs.setdefault("date_to", attrs["date_from"])
+        days = (attrs["date_to"] - attrs["date_from"]).days + 1
+        if days < 1:
+            raise serializers.ValidationError({"date_to": "date_from dan oldin bo'lishi mumkin emas."})
+        if days > self.max_days:
+            raise serializers.ValidationError({"date_to": f"Ko'pi bilan {self.max_days} kun."})
+        return attrs
+
+
+class FreeSlotsQuerySerializer(DateWindowQuerySerializer):
+    slot_minutes = serializers.IntegerField(min_value=15, max_value=720, required=False)
+
+
+class CalendarQuerySerializer(DateWindowQuerySerializer):
+    max_days = CALENDAR_MAX_DAYS
@@ -1,20 +1,83 @@
+from contextlib import contextmanager
 from datetime import datetime, time, timedelta
-from django.db import transaction
-from django.db.models import Q
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, connection, transaction
+from django.db.models import (
+    DecimalField, DurationField, Exists, ExpressionWrapper, F, FilteredRelation, OuterRef, Q, TimeField, Value,
+)
+from django.db.models.functions import Greatest, Least, Round
+from django.utils import timezone
 from decimal import Decimal
-from apps.bookings.models import Booking
+from rest_framework.exceptions import APIException
+from apps.arenas.schedule import day_type, get_schedule, schedule_version
+from apps.bookings import occupancy
+from apps.bookings.models import Booking, BookingSeries, BookingStatus, ACTIVE_BOOKING_STATUSES, OVERLAP_CONSTRAINT
 
 SLOT_MINUTES_DEFAULT = 60  # default slot size
+FREE_SLOTS_MAX_DAYS = 31  # longest date range free_slots answers at once
+CALENDAR_MAX_DAYS = 62  # longest window the calendar answers at once
+SERIES_MAX_OCCURRENCES = 52  # a weekly series covers at most a year
 
+CALENDAR_KEY = "calendar:{arena_id}:{version}:{week}"
+CALENDAR_TIMEOUT = 60 * 60 * 24
 
-def generate_time_slots(arena, slot_minutes=SLOT_MINUTES_DEFAULT):
+
+class BookingConflict(APIException):
+    status_code = 409
+    default_detail = "Bu vaqt allaqachon band qilingan."
+    default_code = "booking_conflict"
+
+
+def is_overlap_violation(error):
+    diag = getattr(error.__cause__, "diag", None)
+    return getattr(diag, "constraint_name", None) == OVERLAP_CONSTRAINT
+
+
+@contextmanager
+def overlap_as_conflict():
+    """
+    Run booking writes in a savepoint and turn a booking_no_overlap violation
+    into BookingConflict (409); the outer transaction stays usable.
     """
-    Generate list of (start_time, end_time) tuples for one day according to arena open/close.
+    try:
+        with transaction.atomic():
+            yield
+    except IntegrityError as error:
+        if is_overlap_violation(error):
+            raise BookingConflict()
+        raise
+
+
+def bookings_changed(arena_id):
+    """
+    Call after any write to an arena's bookings, including bulk updates that
+    bypass signals: once the transaction commits, bumps the arena's occupancy
+    version, which also moves its calendar and free slot validators.
+    """
+    transaction.on_commit(lambda: occupancy.bump_version(arena_id))
+
+
+def released(arena_id, date, start_time, end_time):
+    """
+    Call when an active booking stops holding [start_time, end_time) (after
+    bookings_changed): offers the time to the arena-day's waitlist once the
+    transaction commits.
+    """
+    from apps.bookings.waitlist import match_waitlist
+
+    # a failed match must not fail the cancellation that has already committed
+    transaction.on_commit(lambda: match_waitlist(arena_id, date, start_time, end_time), robust=True)
+
+
+def generate_time_slots(open_time, close_time, slot_minutes=SLOT_MINUTES_DEFAULT):
+    """
+    Generate list of (start_time, end_time) tuples for one day between open and close.
     Does NOT consider bookings — just raw slots.
     """
     slots = []
-    cur = datetime.combine(datetime.today(), arena.open_time)
-    close_dt = datetime.combine(datetime.today(), arena.close_time)
+    cur = datetime.combine(datetime.min, open_time)
+    close_dt = datetime.combine(datetime.min, close_time)
     delta = timedelta(minutes=slot_minutes)
     while cur + delta <= close_dt:
         start = cur.time()
@@ -25,70 +88,420 @@ def generate_time_slots(arena, slot_minutes=SLOT_MINUTES_DEFAULT):
 
 
 def get_booked_intervals(arena, date):
-    """Return list of (start_time, end_time) for confirmed/pending bookings on date"""
-    qs = Booking.objects.filter(
-        arena=arena, date=date, status__in=[Booking.STATUS_PENDING, Booking.STATUS_CONFIRMED]
-    ).values_list("start_time", "end_time")
-    return list(qs)
+    """Return list of (start_time, end_time) for approved/pending bookings on date"""
+    return [(start, end) for start, end, _ in occupancy.get_occupancy(arena.pk, date).intervals]
 
 
 def available_slots(arena, date, slot_minutes=SLOT_MINUTES_DEFAULT):
     """
-    Produce available slots by excluding those that overlap with existing bookings.
-    Overlap rule: slot_start < booking_end and slot_end > booking_start
+    Produce available slots within the day's working hours, checked against
+    the occupancy bitmap instead of scanning every booking per slot.
     """
-    all_slots = generate_time_slots(arena, slot_minutes=slot_minutes)
-    booked = get_booked_intervals(arena, date)
+    hours = get_schedule(arena.pk).hours_for(date)
+    if hours is None:
+        return []
+    all_slots = generate_time_slots(*hours, slot_minutes=slot_minutes)
+    free = occupancy.get_occupancy(arena.pk, date).free_slots(all_slots)
+    return [{"start_time": s, "end_time": e} for s, e in free]
 
-    def overlaps(s, e, b_s, b_e):
-        return (s < b_e) and (e > b_s)
 
-    free = []
-    for s, e in all_slots:
-        conflict = False
-        for b_s, b_e in booked:
-            if overlaps(s, e, b_s, b_e):
-                conflict = True
-                break
-        if not conflict:
-            free.append({"start_time": s, "end_time": e})
-    return free
+def booking_calendar(arena_id, date_from, date_to, version=None):
+    """
+    {date: [[start, end, status], ...]} of active bookings in the window.
+
+    Built and cached per arena-week (Monday to Sunday) under the arena's
+    occupancy version (read from the cache unless passed in), so booking
+    writes retire it in every process; all weeks missing from the cache are
+    read in one query on (arena, date, status).
+    """
+    if version is None:
+        version = occupancy.current_version(arena_id)
+    first_week = date_from - timedelta(days=date_from.weekday())
+    weeks = [first_week + timedelta(weeks=n) for n in range((date_to - first_week).days // 7 + 1)]
+    keys = {week: CALENDAR_KEY.format(arena_id=arena_id, version=version, week=week) for week in weeks}
+
+    cached = cache.get_many(keys.values())
+    by_week = {week: cached[key] for week, key in keys.items() if key in cached}
+    missing = [week for week in weeks if week not in by_week]
+    if missing:
+        fresh = {week: {} for week in missing}
+        rows = Booking.objects.filter(
+            arena_id=arena_id,
+            date__range=(missing[0], missing[-1] + timedelta(days=6)),
+            status__in=ACTIVE_BOOKING_STATUSES,
+        ).order_by("date", "start_time").values_list("date", "start_time", "end_time", "status")
+        for day, start_time, end_time, booking_status in rows:
+            week = day - timedelta(days=day.weekday())
+            if week in fresh:
+                fresh[week].setdefault(str(day), []).append([str(start_time), str(end_time), booking_status])
+        cache.set_many({keys[week]: days for week, days in fresh.items()}, CALENDAR_TIMEOUT)
+        by_week.update(fresh)
+
+    first, last = str(date_from), str(date_to)
+    return {
+        day: bookings
+        for week in weeks
+        for day, bookings in by_week[week].items()
+        if first <= day <= last
+    }
+
+
+def free_gaps(schedule, bookings, date_from, date_to):
+    """
+    Yield (day, working_hours, gaps) for every day in [date_from, date_to].
+
+    `bookings` are (date, start_time, end_time) rows ordered by date and
+    start time, so one linear sweep over them covers the whole range;
+    working_hours is None (and gaps empty) on closed days.
+    """
+    bookings = iter(bookings)
+    booking = next(bookings, None)
+    day = date_from
+    while day <= date_to:
+        hours = schedule.hours_for(day)
+        gaps = []
+        cursor = hours[0] if hours else None
+        while booking is not None and booking[0] <= day:
+            if booking[0] == day and hours:
+                gap_end = min(booking[1], hours[1])
+                if cursor < gap_end:
+                    gaps.append((cursor, gap_end))
+                cursor = max(cursor, booking[2])
+            booking = next(bookings, None)
+        if hours and cursor < hours[1]:
+            gaps.append((cursor, hours[1]))
+        yield day, hours, gaps
+        day += timedelta(days=1)
+
+
+def split_into_slots(gaps, slot_minutes):
+    """Cut free gaps into back-to-back slots of `slot_minutes`, dropping remainders."""
+    delta = timedelta(minutes=slot_minutes)
+    slots = []
+    for start, end in gaps:
+        cur = datetime.combine(datetime.min, start)
+        end_dt = datetime.combine(datetime.min, end)
+        while cur + delta <= end_dt:
+            slots.append((cur.time(), (cur + delta).time()))
+            cur += delta
+    return slots
 
 
 def is_interval_available(arena, date, start_time, end_time):
     """Check if there is any overlapping booking for given interval."""
-    return not Booking.objects.filter(
-        arena=arena, date=date, status__in=[Booking.STATUS_PENDING, Booking.STATUS_CONFIRMED]
-    ).filter(
-        Q(start_time__lt=end_time) & Q(end_time__gt=start_time)
-    ).exists()
+    return occupancy.get_occupancy(arena.pk, date).is_free(start_time, end_time)
 
 
-@transaction.atomic
-def create_booking_atomic(user, arena, date, start_time, end_time, calculate_price_callable):
+def arenas_with_free_gap(queryset, date, window_start=None, window_end=None, duration=None):
     """
-    Atomic booking creation to avoid race conditions.
-    - Optionally lock arena's bookings rows to ensure no concurrent insert clashes.
+    Narrow an Arena queryset to arenas that have at least `duration` of
+    uninterrupted free time on `date`, inside their working hours and the
+    optional [window_start, window_end] window. Runs as a single query.
+
+    A free gap long enough exists iff one can start either at the window
+    start or right where some booking ends, so only those starts are checked.
     """
-    # Lock overlapping rows (if any) to prevent concurrent creates
-    overlapping = Booking.objects.select_for_update().filter(
-        arena=arena, date=date
-    ).filter(
-        Q(start_time__lt=end_time) & Q(end_time__gt=start_time)
+    if duration is None:
+        duration = timedelta(minutes=SLOT_MINUTES_DEFAULT)
+
+    active = Booking.objects.filter(date=date, status__in=ACTIVE_BOOKING_STATUSES)
+
+    def time_plus_duration(field):
+        return ExpressionWrapper(F(field) + Value(duration, DurationField()), output_field=TimeField())
+
+    open_time = F("working_hours__open_time")
+    close_time = F("working_hours__close_time")
+    if window_start is not None:
+        open_time = Greatest(open_time, Value(window_start, TimeField()))
+    if window_end is not None:
+        close_time = Least(close_time, Value(window_end, TimeField()))
+
+    # filtering and annotating through the same (arena, day_of_week) unique
+    # join keeps one row per arena
+    queryset = queryset.filter(working_hours__day_of_week=date.weekday()).annotate(
+        window_start=open_time,
+        window_end=close_time,
+    ).annotate(first_gap_end=time_plus_duration("window_start"))
+
+    # the gap must end inside the window; `end > start` rules out times
+    # that wrapped past midnight
+    free_from_window_start = Q(
+        first_gap_end__lte=F("window_end"),
+        first_gap_end__gt=F("window_start"),
+    ) & ~Exists(active.filter(
+        arena=OuterRef("pk"),
+        start_time__lt=OuterRef("first_gap_end"),
+        end_time__gt=OuterRef("window_start"),
+    ))
+
+    free_after_a_booking = Exists(
+        active.filter(arena=OuterRef("pk"))
+        .annotate(gap_end=time_plus_duration("end_time"))
+        .filter(
+            end_time__gte=OuterRef("window_start"),
+            gap_end__lte=OuterRef("window_end"),
+            gap_end__gt=F("end_time"),
+        )
+        .filter(~Exists(active.filter(
+            arena=OuterRef(OuterRef("pk")),
+            start_time__lt=OuterRef("gap_end"),
+            end_time__gt=OuterRef("end_time"),
+        )))
     )
 
-    if overlapping.exists():
-        raise ValueError("Time slot is already booked")
+    return queryset.filter(free_from_window_start | free_after_a_booking)
 
-    total_price = calculate_price_callable(arena, start_time, end_time)
-    booking = Booking.objects.create(
-        user=user,
-        arena=arena,
+
+def arenas_free_for(queryset, date, start_time, end_time, max_price=None):
+    """
+    Narrow an Arena queryset to arenas that can host exactly
+    [start_time, end_time) on `date`: open for the whole interval and no
+    active booking overlapping it. Annotates `price_per_hour` for the day
+    type (None when unpriced); with `max_price` only arenas whose quote for
+    the interval fits are kept. Runs as a single query.
+    """
+    hours = Decimal((datetime.combine(date, end_time) - datetime.combine(date, start_time)).total_seconds()) / 3600
+
+    queryset = queryset.filter(
+        working_hours__day_of_week=date.weekday(),
+        working_hours__open_time__lte=start_time,
+        working_hours__close_time__gte=end_time,
+    ).annotate(
+        day_price=FilteredRelation("prices", condition=Q(prices__day_type=day_type(date))),
+        price_per_hour=F("day_price__price_per_hour"),
+    ).filter(~Exists(Booking.objects.filter(
+        arena=OuterRef("pk"),
         date=date,
-        start_time=start_time,
-        end_time=end_time,
-        total_price=Decimal(total_price),
-        status=Booking.STATUS_CONFIRMED,  # or pending depending on business
+        status__in=ACTIVE_BOOKING_STATUSES,
+        start_time__lt=end_time,
+        end_time__gt=start_time,
+    )))
+
+    if max_price is not None:
+        # rounded half-up to cents like price_for_duration, so the cap matches the quote shown
+        queryset = queryset.alias(
+            quoted_price=Round(
+                ExpressionWrapper(F("price_per_hour") * Value(hours), output_field=DecimalField()), 2
+            ),
+        ).filter(quoted_price__lte=max_price)
+    return queryset
+
+
+def create_booking_atomic(user, arena, date, start_time, end_time, total_price=None,
+                          status=BookingStatus.PENDING, hold=False):
+    """
+    Insert a booking; the booking_no_overlap exclusion constraint rejects it
+    if it overlaps an active booking, however many requests race for the
+    slot, so nothing has to be locked up front. Raises BookingConflict (409).
+    With `hold`, a pending booking is a checkout hold that
+    expire_pending_bookings cancels after BOOKING_HOLD_MINUTES.
+    """
+    hold_expires_at = None
+    if hold and status == BookingStatus.PENDING:
+        hold_expires_at = timezone.now() + timedelta(minutes=settings.BOOKING_HOLD_MINUTES)
+    with overlap_as_conflict():
+        return Booking.objects.create(
+            user=user,
+            arena=arena,
+            date=date,
+            start_time=start_time,
+            end_time=end_time,
+            total_price=total_price,
+            status=status,
+            hold_expires_at=hold_expires_at,
+        )
+
+
+def series_dates(weekday, start_date, end_date):
+    """Every `weekday` in [start_date, end_date]."""
+    first = start_date + timedelta(days=(weekday - start_date.weekday()) % 7)
+    if first > end_date:
+        return []
+    return [first + timedelta(weeks=n) for n in range((end_date - first).days // 7 + 1)]
+
+
+def series_conflicts(arena_id, dates, start_time, end_time):
+    """Dates on which [start_time, end_time) overlaps an active booking; one query."""
+    return sorted(set(
+        Booking.objects.filter(
+            arena_id=arena_id,
+            date__in=dates,
+            status__in=ACTIVE_BOOKING_STATUSES,
+            start_time__lt=end_time,
+            end_time__gt=start_time,
+        ).values_list("date", flat=True)
+    ))
+
+
+def _series_conflict(dates):
+    return BookingConflict({
+        "error": "Seriyadagi ba'zi sanalar allaqachon band qilingan.",
+        "conflicts": [str(day) for day in dates],
+    })
+
+
+def create_booking_series(user, arena, weekday, start_time, end_time, start_date, end_date):
+    """
+    Book `weekday` start_time-end_time every week from start_date to
+    end_date: all or nothing. Conflicting dates are found in one query and
+    reported together (BookingConflict, 409); otherwise the occurrences are
+    priced from the arena's cached schedule and inserted with one
+    bulk_create in a transaction.
+    """
+    dates = series_dates(weekday, start_date, end_date)
+    conflicts = series_conflicts(arena.pk, dates, start_time, end_time)
+    if conflicts:
+        raise _series_conflict(conflicts)
+
+    schedule = get_schedule(arena.pk, schedule_version(arena.updated_at))
+    occurrences = [
+        Booking(user=user, arena=arena, date=day, start_time=start_time, end_time=end_time,
+                total_price=schedule.price_for(day, start_time, end_time))
+        for day in dates
+    ]
+
+    try:
+        with transaction.atomic():
+            series = BookingSeries.objects.create(
+                user=user, arena=arena, weekday=weekday,
+                start_time=start_time, end_time=end_time,
+                start_date=start_date, end_date=end_date,
+            )
+            for booking in occurrences:
+                booking.series = series
+            Booking.objects.bulk_create(occurrences)
+            # bulk_create sends no post_save
+            bookings_changed(arena.pk)
+    except IntegrityError as error:
+        if not is_overlap_violation(error):
+            raise
+        # another booking won a date in the meantime
+        raise _series_conflict(series_conflicts(arena.pk, dates, start_time, end_time))
+    return series
+
+
+def expire_pending_bookings(batch_size=500, now=None):
+    """
+    Cancel pending checkout holds whose hold_expires_at has passed, oldest
+    first, in transactions of at most `batch_size` rows (read from the
+    partial hold index); pending bookings without a hold (awaiting approval,
+    series occurrences) are never touched. Rows locked by a concurrent
+    approve/cancel are skipped and picked up next run. Each user is told
+    through the outbox. Returns the number of cancelled bookings.
+    """
+    from apps.shared.models import OutboxEvent
+    from apps.shared.outbox import hold_expired_event
+
+    now = now or timezone.now()
+    expired = 0
+    while True:
+        with transaction.atomic():
+            rows = list(
+                Booking.objects.select_for_update(skip_locked=True)
+                .filter(status=BookingStatus.PENDING, hold_expires_at__lte=now)
+                .order_by("hold_expires_at")
+                .values_list("pk", "arena_id", "user_id", "date", "start_time", "end_time")[:batch_size]
+            )
+            if not rows:
+                break
+            Booking.objects.filter(
+                pk__in=[row[0] for row in rows], status=BookingStatus.PENDING
+            ).update(status=BookingStatus.CANCELED)
+            # update() sends no signals
+            for arena_id in {row[1] for row in rows}:
+                bookings_changed(arena_id)
+            for _, arena_id, _, date, start_time, end_time in rows:
+                released(arena_id, date, start_time, end_time)
+            OutboxEvent.objects.bulk_create([
+                hold_expired_event(user_id, booking_id, arena_id, date, start_time)
+                for booking_id, arena_id, user_id, date, start_time, _ in rows
+            ])
+        expired += len(rows)
+        if len(rows) < batch_size:
+            break
+    return expired
+
+
+def complete_past_bookings(batch_size=500, now=None):
+    """
+    Move approved bookings that have ended to COMPLETED, walking
+    (date, id) keyset pages of at most `batch_size` rows, one short
+    transaction each. Rows locked elsewhere (e.g. another node running the
+    same sweep) are skipped, and the UPDATE only matches rows still
+    approved, so concurrent runs never double count.
+    Returns (completed, batches).
+    """
+    now = timezone.localtime(now)
+    today, current_time = now.date(), now.time()
+    ended = Q(date__lt=today) | Q(date=today, end_time__lte=current_time)
+
+    completed = batches = 0
+    last = None
+    while True:
+        page = Booking.objects.filter(ended, status=BookingStatus.APPROVED)
+        if last is not None:
+            page = page.filter(Q(date__gt=last[0]) | Q(date=last[0], pk__gt=last[1]))
+        with transaction.atomic():
+            rows = list(
+                page.select_for_update(skip_locked=True)
+                .order_by("date", "pk")
+                .values_list("date", "pk", "arena_id")[:batch_size]
+            )
+            if not rows:
+                break
+            completed += Booking.objects.filter(
+                pk__in=[pk for _, pk, _ in rows], status=BookingStatus.APPROVED
+            ).update(status=BookingStatus.COMPLETED)
+            # update() sends no signals
+            for arena_id in {arena_id for _, _, arena_id in rows}:
+                bookings_changed(arena_id)
+        batches += 1
+        last = rows[-1][:2]
+        if len(rows) < batch_size:
+            break
+    return completed, batches
+
+
+# action -> (statuses it may start from, status it sets)
+TRANSITIONS = {
+    "approve": ([BookingStatus.PENDING], BookingStatus.APPROVED),
+    "reject": ([BookingStatus.PENDING], BookingStatus.REJECTED),
+    "cancel": (ACTIVE_BOOKING_STATUSES, BookingStatus.CANCELED),
+}
+BULK_TRANSITION_LIMIT = 100
+
+
+def transition_bookings(queryset, action):
+    """
+    Compare-and-set status change for the bookings in `queryset`, as one
+    `UPDATE ... WHERE status = ANY(...) RETURNING`. Only the status column
+    is written, and only rows still in an allowed status change, so of two
+    racing transitions exactly one wins. Returns the ids that changed and
+    runs the side effects (cache validators, notification outbox) for them.
+    """
+    from apps.shared.models import OutboxEvent
+    from apps.shared.outbox import NOTIFIED_STATUSES, booking_status_event
+
+    from_statuses, to_status = TRANSITIONS[action]
+    scope_sql, scope_params = queryset.order_by().values("pk").query.sql_with_params()
+    sql = (
+        f'UPDATE "{Booking._meta.db_table}" SET "status" = %s '
+        f'WHERE "status" = ANY(%s) AND "id" IN ({scope_sql}) '
+        f'RETURNING "id", "arena_id", "user_id", "date", "start_time", "end_time"'
     )
-    # Domain events, notifications, payment processing are triggered here (outside)
-    return booking
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [str(to_status), [str(status) for status in from_statuses], *scope_params])
+            rows = cursor.fetchall()
+
+        for arena_id in {row[1] for row in rows}:
+            bookings_changed(arena_id)
+        if to_status not in ACTIVE_BOOKING_STATUSES:
+            for _, arena_id, _, date, start_time, end_time in rows:
+                released(arena_id, date, start_time, end_time)
+        if rows and to_status in NOTIFIED_STATUSES:
+            OutboxEvent.objects.bulk_create([
+                booking_status_event(user_id, booking_id, to_status, arena_id, date)
+                for booking_id, arena_id, user_id, date, _, _ in rows
+            ])
+    return [row[0] for row in rows]
@@ -0,0 +1,25 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Booking, ACTIVE_BOOKING_STATUSES
+from .services import bookings_changed, released
+
+
+@receiver([post_save, post_delete], sender=Booking)
+def booking_changed(sender, instance, **kwargs):
+    bookings_changed(instance.arena_id)
+
+
+@receiver(post_save, sender=Booking)
+def booking_released_on_save(sender, instance, created, **kwargs):
+    # active -> cancelled/rejected/...; the freed time goes to the waitlist
+    loaded_status = getattr(instance, "_loaded_status", None)
+    if created or loaded_status not in ACTIVE_BOOKING_STATUSES or instance.status in ACTIVE_BOOKING_STATUSES:
+        return
+    released(instance.arena_id, instance.date, instance.start_time, instance.end_time)
+
+
+@receiver(post_delete, sender=Booking)
+def booking_released_on_delete(sender, instance, **kwargs):
+    if instance.status in ACTIVE_BOOKING_STATUSES:
+        released(instance.arena_id, instance.date, instance.start_time, instance.end_time)
@@ -1,37 +1,490 @@
-from django.test import TestCase
+import threading
+from decimal import Decimal
+from io import StringIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.utils import timezone
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, connection
+from django.test import TestCase, TransactionTestCase
 from django.contrib.auth import get_user_model
-from apps.arenas.models import Arena
-from .models import Booking
-from datetime import date, time
+from rest_framework.test import APIClient
+from apps.arenas.models import Arena, City, SportType, WorkingHours, PriceTable
+from apps.arenas.schedule import get_schedule
+from .models import Booking, BookingStatus, WaitlistEntry, WaitlistStatus
+from .occupancy import cell_mask, get_occupancy
+from .services import available_slots, expire_pending_bookings, transition_bookings
+from apps.shared.models import Notification, OutboxEvent
+from apps.shared.outbox import dispatch_outbox
+from datetime import date, time, timedelta
 
 User = get_user_model()
 
-class BookingRaceTest(TestCase):
+
+class BookingFixturesMixin:
     def setUp(self):
-        self.user = User.objects.create_user(username="u1", password="pass123456")
+        cache.clear()
+        self.user = User.objects.create(username="player", phone="+998900000002")
+        self.owner = User.objects.create(username="owner", phone="+998900000001")
         self.arena = Arena.objects.create(
+            owner=self.owner,
             name="Test Arena",
-            slug="test-arena",
-            sport_type="football",
-            price_per_hour=50.0
+            city=City.objects.create(name="Tashkent"),
+            sport_type=SportType.objects.create(name="Football"),
+            address="Chilonzor 1",
         )
+        for day in range(7):
+            WorkingHours.objects.create(arena=self.arena, day_of_week=day, open_time=time(8), close_time=time(23))
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
 
-    def test_double_booking_prevented(self):
-        Booking.objects.create(
-            user=self.user,
-            arena=self.arena,
-            date=date.today(),
-            start_time=time(10, 0),
-            end_time=time(11, 0),
-            status=Booking.STATUS_CONFIRMED
+    def book(self, day, start, end, status=BookingStatus.APPROVED, arena=None):
+        return Booking.objects.create(
+            user=self.user, arena=arena or self.arena, date=day,
+            start_time=start, end_time=end, status=status,
         )
+
+
+class BookingRaceTest(BookingFixturesMixin, TestCase):
+    def test_double_booking_prevented(self):
+        day = date(2025, 12, 15)
+        self.book(day, time(10), time(11))
         # try create overlapping booking
-        with self.assertRaises(Exception):
-            Booking.objects.create(
-                user=self.user,
-                arena=self.arena,
-                date=date.today(),
-                start_time=time(10, 30),
-                end_time=time(11, 30),
-                status=Booking.STATUS_CONFIRMED
-            )
+        with self.assertRaises(IntegrityError):
+            self.book(day, time(10, 30), time(11, 30), status=BookingStatus.PENDING)
+
+    def test_inactive_and_adjacent_bookings_allowed(self):
+        day = date(2025, 12, 15)
+        self.book(day, time(10), time(11), status=BookingStatus.CANCELED)
+        self.book(day, time(10), time(11))
+        self.book(day, time(11), time(12))
+        self.assertEqual(Booking.objects.count(), 3)
+
+    def test_api_returns_conflict(self):
+        payload = {"arena": self.arena.id, "date": "2025-12-15", "start_time": "10:00", "end_time": "11:00"}
+        self.assertEqual(self.client.post("/api/bookings/", payload).status_code, 201)
+
+        payload["start_time"] = "10:30"
+        payload["end_time"] = "11:30"
+        response = self.client.post("/api/bookings/", payload)
+        self.assertEqual(response.status_code, 409)
+
+        payload["start_time"] = "06:00"
+        self.assertEqual(self.client.post("/api/bookings/", payload).status_code, 400)
+
+
+class BookingConcurrencyTest(BookingFixturesMixin, TransactionTestCase):
+    def test_parallel_overlapping_requests(self):
+        workers = 8
+        barrier = threading.Barrier(workers)
+        statuses, errors = [], []
+
+        def request(minute):
+            client = APIClient()
+            client.force_authenticate(self.user)
+            try:
+                barrier.wait()
+                response = client.post("/api/bookings/", {
+                    "arena": self.arena.id, "date": "2025-12-15",
+                    "start_time": f"10:{minute:02d}", "end_time": "11:30",
+                })
+                statuses.append(response.status_code)
+            except Exception as error:
+                errors.append(error)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=request, args=(minute,)) for minute in range(workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(sorted(statuses), [201] + [409] * (workers - 1))
+        self.assertEqual(Booking.objects.filter(arena=self.arena).count(), 1)
+
+
+class BookingConditionalGetTest(BookingFixturesMixin, TestCase):
+    def test_calendar_and_free_slots_revalidate(self):
+        day = date(2025, 12, 15)
+        self.book(day, time(10), time(11))
+        for url in [f"/api/bookings/calendar/{self.arena.id}/?date_from={day}",
+                    f"/api/bookings/free_slots/{self.arena.id}/?date={day}"]:
+            etag = self.client.get(url)["ETag"]
+            with self.assertNumQueries(1):
+                self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+            with self.captureOnCommitCallbacks(execute=True):
+                booking = self.book(day, time(12), time(13), status=BookingStatus.PENDING)
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+            with self.captureOnCommitCallbacks(execute=True):
+                booking.delete()
+
+
+class ArenaScheduleCacheTest(BookingFixturesMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        PriceTable.objects.create(arena=self.arena, day_type="weekday", price_per_hour=Decimal("100000"))
+        PriceTable.objects.create(arena=self.arena, day_type="weekend", price_per_hour=Decimal("150000"))
+
+    def test_clean_and_price_use_cached_schedule(self):
+        booking = Booking(user=self.user, arena=self.arena, date=date(2025, 12, 15),
+                          start_time=time(10), end_time=time(11, 30))
+        booking.calculate_price()
+        self.assertEqual(booking.total_price, Decimal("150000"))
+
+        booking.date = date(2025, 12, 20)  # saturday
+        with self.assertNumQueries(1):  # the version (arena updated_at)
+            booking.calculate_price()
+        self.assertEqual(booking.total_price, Decimal("225000"))
+
+        booking.start_time = time(7)
+        with self.assertRaises(ValidationError):
+            booking.clean()
+        booking.start_time, booking.end_time = time(22), time(23, 30)  # past closing
+        with self.assertRaises(ValidationError):
+            booking.clean()
+
+    def test_schedule_writes_invalidate(self):
+        day = date(2025, 12, 15)
+        self.client.get(f"/api/bookings/free_slots/{self.arena.id}/?date={day}")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            WorkingHours.objects.filter(arena=self.arena, day_of_week=day.weekday()).get().delete()
+            WorkingHours.objects.create(arena=self.arena, day_of_week=day.weekday(),
+                                        open_time=time(9), close_time=time(18))
+
+        response = self.client.get(f"/api/bookings/free_slots/{self.arena.id}/?date={day}")
+        self.assertEqual(response.data["working_hours"], ["09:00:00", "18:00:00"])
+
+
+class FreeSlotsRangeTest(BookingFixturesMixin, TestCase):
+    def test_range_in_one_bookings_query(self):
+        monday = date(2025, 12, 15)
+        WorkingHours.objects.filter(arena=self.arena, day_of_week=2).delete()
+        self.book(monday, time(7), time(9))
+        self.book(monday, time(10), time(11))
+        self.book(date(2025, 12, 16), time(22), time(23, 30), status=BookingStatus.PENDING)
+        self.book(monday, time(12), time(13), status=BookingStatus.CANCELED)
+
+        url = f"/api/bookings/free_slots/{self.arena.id}/?date_from=2025-12-15&date_to=2025-12-18"
+        self.client.get(url)
+        # only the arena validators; schedule and occupancy are cached
+        with self.assertNumQueries(1):
+            days = self.client.get(url).data["days"]
+
+        self.assertEqual(len(days), 4)
+        self.assertEqual(days[0]["free_slots"], [["09:00:00", "10:00:00"], ["11:00:00", "23:00:00"]])
+        self.assertEqual(days[1]["free_slots"], [["08:00:00", "22:00:00"]])
+        self.assertIsNone(days[2]["working_hours"])
+        self.assertEqual(days[2]["free_slots"], [])
+        self.assertEqual(days[3]["free_slots"], [["08:00:00", "23:00:00"]])
+
+    def test_slot_minutes_and_limits(self):
+        self.book(date(2025, 12, 15), time(8, 30), time(22))
+        response = self.client.get(
+            f"/api/bookings/free_slots/{self.arena.id}/?date_from=2025-12-15&slot_minutes=30"
+        )
+        self.assertEqual(response.data["days"][0]["free_slots"], [
+            ["08:00:00", "08:30:00"], ["22:00:00", "22:30:00"], ["22:30:00", "23:00:00"],
+        ])
+
+        response = self.client.get(
+            f"/api/bookings/free_slots/{self.arena.id}/?date_from=2025-12-01&date_to=2026-02-01"
+        )
+        self.assertEqual(response.status_code, 400)
+
+        legacy = self.client.get(f"/api/bookings/free_slots/{self.arena.id}/?date=2025-12-15").data
+        self.assertEqual(legacy["free_slots"], [["08:00:00", "08:30:00"], ["22:00:00", "23:00:00"]])
+
+
+class OccupancyIndexTest(BookingFixturesMixin, TestCase):
+    def test_bitmap_and_exact_fallback(self):
+        day = date(2025, 12, 15)
+        booking = self.book(day, time(10, 10), time(11))
+        occupied = get_occupancy(self.arena.id, day)
+
+        self.assertEqual(occupied.bits, cell_mask(time(10), time(11)))
+        self.assertTrue(occupied.is_free(time(9), time(10)))
+        # shares the 10:00 cell but ends before the booking starts
+        self.assertTrue(occupied.is_free(time(9, 30), time(10, 10)))
+        self.assertFalse(occupied.is_free(time(10, 30), time(12)))
+        self.assertTrue(occupied.is_free(time(10, 30), time(12), exclude=booking.id))
+
+        with self.assertNumQueries(0):  # the version comes from the cache
+            get_occupancy(self.arena.id, day)
+
+    def test_booking_changes_invalidate(self):
+        day = date(2025, 12, 15)
+        self.assertEqual(len(available_slots(self.arena, day)), 15)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            booking = self.book(day, time(9), time(11))
+        self.assertEqual(len(available_slots(self.arena, day)), 13)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            booking.status = BookingStatus.CANCELED
+            booking.save()
+        self.assertEqual(len(available_slots(self.arena, day)), 15)
+
+    def test_lost_version_counter_starts_over(self):
+        day = date(2025, 12, 15)
+        self.assertEqual(len(available_slots(self.arena, day)), 15)
+
+        # the cache lost the counter: it restarts from the clock, not from a version seen before
+        self.book(day, time(9), time(11))
+        cache.clear()
+        self.assertEqual(len(available_slots(self.arena, day)), 13)
+
+
+class BookingCalendarTest(BookingFixturesMixin, TestCase):
+    def test_windowed_columnar_calendar(self):
+        self.book(date(2025, 12, 14), time(9), time(10))
+        self.book(date(2025, 12, 15), time(12), time(13), status=BookingStatus.PENDING)
+        self.book(date(2025, 12, 15), time(10), time(11))
+        self.book(date(2025, 12, 16), time(10), time(11), status=BookingStatus.REJECTED)
+        self.book(date(2025, 12, 23), time(10), time(11))
+
+        url = f"/api/bookings/calendar/{self.arena.id}/?date_from=2025-12-15&date_to=2025-12-22"
+        response = self.client.get(url)
+        self.assertEqual(response.data["bookings"], {
+            "2025-12-15": [["10:00:00", "11:00:00", "approved"], ["12:00:00", "13:00:00", "pending"]],
+        })
+
+        # both weeks come from the cache; only the arena validators hit the db
+        with self.assertNumQueries(1):
+            self.client.get(url)
+
+        # booked and committed through another worker
+        with self.captureOnCommitCallbacks(execute=True):
+            self.book(date(2025, 12, 22), time(8), time(9))
+        self.assertIn("2025-12-22", self.client.get(url).data["bookings"])
+
+    def test_window_is_required_and_bounded(self):
+        url = f"/api/bookings/calendar/{self.arena.id}/"
+        self.assertEqual(self.client.get(url).status_code, 400)
+        self.assertEqual(self.client.get(url + "?date_from=2025-01-01&date_to=2025-06-01").status_code, 400)
+
+
+class BookingSeriesTest(BookingFixturesMixin, TestCase):
+    url = "/api/booking-series/"
+
+    def payload(self, **overrides):
+        payload = {
+            "arena": self.arena.id, "weekday": 1,
+            "start_time": "19:00", "end_time": "21:00",
+            "start_date": "2025-12-01", "end_date": "2025-12-31",
+        }
+        payload.update(overrides)
+        return payload
+
+    def test_series_books_every_week(self):
+        PriceTable.objects.create(arena=self.arena, day_type="weekday", price_per_hour=Decimal("100000"))
+
+        get_schedule(self.arena.id)  # warm the schedule cache
+        # arena, conflicts, savepoint, series, one bulk insert, release, response
+        # occurrences; the schedule is fetched once, from the cache
+        with self.assertNumQueries(7):
+            response = self.client.post(self.url, self.payload())
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual([o["date"] for o in response.data["occurrences"]],
+                         ["2025-12-02", "2025-12-09", "2025-12-16", "2025-12-23", "2025-12-30"])
+        self.assertTrue(all(o["total_price"] == "200000.00" for o in response.data["occurrences"]))
+        self.assertEqual(Booking.objects.filter(series_id=response.data["id"], status=BookingStatus.PENDING).count(), 5)
+
+    def test_conflicts_reported_without_partial_writes(self):
+        self.book(date(2025, 12, 9), time(20), time(22))
+        self.book(date(2025, 12, 23), time(18), time(19, 30), status=BookingStatus.PENDING)
+        self.book(date(2025, 12, 16), time(19), time(21), status=BookingStatus.CANCELED)
+
+        response = self.client.post(self.url, self.payload())
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data["conflicts"], ["2025-12-09", "2025-12-23"])
+        self.assertFalse(Booking.objects.filter(series__isnull=False).exists())
+
+        response = self.client.post(self.url, self.payload(start_time="06:00"))
+        self.assertEqual(response.status_code, 400)
+
+
+class PendingHoldExpiryTest(BookingFixturesMixin, TestCase):
+    def test_expired_holds_are_cancelled_and_slots_freed(self):
+        day = date(2025, 12, 15)
+        stale = self.book(day, time(10), time(11), status=BookingStatus.PENDING)
+        fresh = self.book(day, time(12), time(13), status=BookingStatus.PENDING)
+        awaiting_approval = self.book(day, time(16), time(17), status=BookingStatus.PENDING)
+        approved = self.book(day, time(14), time(15))
+        Booking.objects.filter(pk__in=[stale.pk, approved.pk]).update(
+            hold_expires_at=timezone.now() - timedelta(minutes=1)
+        )
+        Booking.objects.filter(pk=fresh.pk).update(hold_expires_at=timezone.now() + timedelta(minutes=10))
+        Booking.objects.filter(pk=awaiting_approval.pk).update(created_at=timezone.now() - timedelta(days=1))
+        self.assertFalse(get_occupancy(self.arena.id, day).is_free(time(10), time(11)))
+
+        out = StringIO()
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command("expire_pending_bookings", batch_size=1, stdout=out)
+        self.assertIn("Expired 1", out.getvalue())
+
+        statuses = dict(Booking.objects.values_list("pk", "status"))
+        self.assertEqual(statuses[stale.pk], BookingStatus.CANCELED)
+        self.assertEqual(statuses[fresh.pk], BookingStatus.PENDING)
+        self.assertEqual(statuses[awaiting_approval.pk], BookingStatus.PENDING)
+        self.assertEqual(statuses[approved.pk], BookingStatus.APPROVED)
+        self.assertTrue(get_occupancy(self.arena.id, day).is_free(time(10), time(11)))
+
+        event = OutboxEvent.objects.get(kind="booking_hold_expired")
+        self.assertEqual((event.user_id, event.payload["booking"]), (self.user.pk, stale.pk))
+
+    def test_only_requested_holds_expire(self):
+        payload = {"arena": self.arena.pk, "date": "2025-12-15", "start_time": "10:00", "end_time": "11:00"}
+        response = self.client.post("/api/bookings/", payload, format="json")
+        self.assertEqual(response.status_code, 201)
+        self.assertIsNone(response.data["hold_expires_at"])
+
+        response = self.client.post("/api/bookings/", {**payload, "start_time": "12:00", "end_time": "13:00",
+                                                        "hold": True}, format="json")
+        self.assertEqual(response.status_code, 201)
+        self.assertIsNotNone(response.data["hold_expires_at"])
+
+        later = timezone.now() + timedelta(minutes=settings.BOOKING_HOLD_MINUTES + 1)
+        self.assertEqual(expire_pending_bookings(now=later), 1)
+        self.assertEqual(Booking.objects.get(pk=response.data["id"]).status, BookingStatus.CANCELED)
+
+
+class CompletePastBookingsTest(BookingFixturesMixin, TestCase):
+    def test_only_ended_approved_bookings_complete(self):
+        today = timezone.localdate()
+        past = [self.book(today - timedelta(days=offset), time(10), time(11)) for offset in range(1, 6)]
+        pending = self.book(today - timedelta(days=1), time(12), time(13), status=BookingStatus.PENDING)
+        future = self.book(today + timedelta(days=1), time(10), time(11))
+
+        out = StringIO()
+        call_command("complete_past_bookings", batch_size=2, stdout=out)
+        self.assertIn("Completed 5 bookings in 3 batches", out.getvalue())
+
+        statuses = dict(Booking.objects.values_list("pk", "status"))
+        self.assertTrue(all(statuses[b.pk] == BookingStatus.COMPLETED for b in past))
+        self.assertEqual(statuses[pending.pk], BookingStatus.PENDING)
+        self.assertEqual(statuses[future.pk], BookingStatus.APPROVED)
+
+        call_command("complete_past_bookings", stdout=out)
+        self.assertIn("Completed 0 bookings", out.getvalue())
+
+
+class BookingTransitionTest(BookingFixturesMixin, TestCase):
+    def test_compare_and_set_has_one_winner(self):
+        booking = self.book(date(2025, 12, 15), time(10), time(11), status=BookingStatus.PENDING)
+
+        self.assertEqual(transition_bookings(Booking.objects.filter(pk=booking.pk), "approve"), [booking.pk])
+        self.assertEqual(transition_bookings(Booking.objects.filter(pk=booking.pk), "reject"), [])
+        booking.refresh_from_db()
+        self.assertEqual(booking.status, BookingStatus.APPROVED)
+        self.assertEqual(OutboxEvent.objects.filter(user=self.user).count(), 1)
+
+        response = self.client.post(f"/api/bookings/{booking.pk}/cancel/")
+        self.assertEqual(response.status_code, 200)
+        response = self.client.post(f"/api/bookings/{booking.pk}/cancel/")
+        self.assertEqual(response.status_code, 400)
+
+    def test_bulk_transition_by_arena_owner(self):
+        day = date(2025, 12, 15)
+        pending = [self.book(day, time(hour), time(hour + 1), status=BookingStatus.PENDING) for hour in (9, 10, 11)]
+        approved = self.book(day, time(12), time(13))
+        elsewhere = Arena.objects.create(owner=self.user, name="Other", city=self.arena.city,
+                                         sport_type=self.arena.sport_type, address="Yunusobod")
+        foreign = self.book(day, time(9), time(10), status=BookingStatus.PENDING, arena=elsewhere)
+
+        self.client.force_authenticate(self.owner)
+        ids = [b.pk for b in pending] + [approved.pk, foreign.pk]
+        # savepoint, the one UPDATE, outbox insert, release
+        with self.assertNumQueries(4):
+            response = self.client.post("/api/bookings/bulk_transition/", {"action": "approve", "ids": ids}, format="json")
+
+        self.assertEqual(sorted(response.data["updated"]), [b.pk for b in pending])
+        self.assertEqual(response.data["skipped"], sorted([approved.pk, foreign.pk]))
+        self.assertEqual(Booking.objects.filter(status=BookingStatus.APPROVED, arena=self.arena).count(), 4)
+        self.assertEqual(OutboxEvent.objects.count(), 3)
+
+        self.client.force_authenticate(self.user)
+        response = self.client.post("/api/bookings/bulk_transition/", {"action": "approve", "ids": [foreign.pk]}, format="json")
+        self.assertEqual(response.data["updated"], [foreign.pk])
+
+
+class WaitlistTest(BookingFixturesMixin, TestCase):
+    def wait(self, day, start, end, duration=None):
+        return WaitlistEntry.objects.create(
+            user=self.owner, arena=self.arena, date=day,
+            start_time=start, end_time=end, duration_minutes=duration,
+        )
+
+    def test_released_time_goes_to_earliest_entry_that_fits(self):
+        day = timezone.localdate() + timedelta(days=3)
+        booking = self.book(day, time(10), time(11))
+        self.book(day, time(11), time(12))
+        self.wait(day, time(14), time(16))  # not touched by the release
+        too_long = self.wait(day, time(9), time(13), duration=180)  # only 09-11 is free in its window
+        whole_window = self.wait(day, time(10), time(12))  # 11-12 is still booked
+        fits = self.wait(day, time(10), time(11))
+        later = self.wait(day, time(10), time(11))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(f"/api/bookings/{booking.pk}/cancel/")
+        self.assertEqual(response.status_code, 200)
+
+        statuses = dict(WaitlistEntry.objects.values_list("pk", "status"))
+        self.assertEqual(statuses[fits.pk], WaitlistStatus.NOTIFIED)
+        for entry in (too_long, whole_window, later):
+            self.assertEqual(statuses[entry.pk], WaitlistStatus.WAITING)
+
+        event = OutboxEvent.objects.get(kind="waitlist_slot_free")
+        self.assertEqual(event.payload["entry"], fits.pk)
+        self.assertEqual((event.payload["start_time"], event.payload["end_time"]), ("10:00", "11:00"))
+        dispatch_outbox()
+        self.assertTrue(Notification.objects.filter(user=self.owner, message__contains="10:00-11:00").exists())
+
+    def test_expired_hold_and_delete_release_time(self):
+        day = timezone.localdate() + timedelta(days=3)
+        hold = self.book(day, time(10), time(11), status=BookingStatus.PENDING)
+        Booking.objects.filter(pk=hold.pk).update(hold_expires_at=timezone.now() - timedelta(minutes=1))
+        deleted = self.book(day, time(18), time(19))
+        morning = self.wait(day, time(9), time(12), duration=60)
+        evening = self.wait(day, time(18), time(20))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command("expire_pending_bookings", stdout=StringIO())
+            deleted.delete()
+
+        self.assertEqual(
+            set(WaitlistEntry.objects.filter(status=WaitlistStatus.NOTIFIED).values_list("pk", flat=True)),
+            {morning.pk, evening.pk},
+        )
+
+    def test_past_entries_expire_with_the_completion_sweep(self):
+        today = timezone.localdate()
+        past = [self.wait(today - timedelta(days=offset), time(10), time(11)) for offset in (1, 2, 3)]
+        upcoming = self.wait(today + timedelta(days=1), time(10), time(11))
+
+        out = StringIO()
+        call_command("complete_past_bookings", batch_size=2, stdout=out)
+        self.assertIn("Expired 3 waitlist entries", out.getvalue())
+
+        statuses = dict(WaitlistEntry.objects.values_list("pk", "status"))
+        self.assertTrue(all(statuses[entry.pk] == WaitlistStatus.EXPIRED for entry in past))
+        self.assertEqual(statuses[upcoming.pk], WaitlistStatus.WAITING)
+
+    def test_create_validates_window(self):
+        day = (timezone.localdate() + timedelta(days=3)).isoformat()
+        payload = {"arena": self.arena.pk, "date": day, "start_time": "10:00", "end_time": "11:00"}
+
+        response = self.client.post("/api/waitlist/", {**payload, "duration_minutes": 90}, format="json")
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post("/api/waitlist/", {**payload, "end_time": "09:00"}, format="json")
+        self.assertEqual(response.status_code, 400)
+
+        response = self.client.post("/api/waitlist/", payload, format="json")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data["status"], WaitlistStatus.WAITING)
+        self.assertEqual(self.client.get("/api/waitlist/").data[0]["id"], response.data["id"])
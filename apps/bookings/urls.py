@@ -1,7 +1,9 @@
 from rest_framework.routers import DefaultRouter
-from .views import BookingViewSet
+from .views import BookingViewSet, BookingSeriesViewSet, WaitlistViewSet
 
 router = DefaultRouter()
+router.register("booking-series", BookingSeriesViewSet)
 router.register("bookings", BookingViewSet)
+router.register("waitlist", WaitlistViewSet)
 
 urlpatterns = router.urls
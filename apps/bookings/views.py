@@ -1,11 +1,39 @@
 from datetime import datetime
 
-from rest_framework import viewsets, permissions, status
+from rest_framework import mixins, viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 
-from .models import Booking, BookingStatus
-from .serializers import BookingSerializer, BookingCreateSerializer
+from apps.arenas.models import Arena
+from apps.arenas.schedule import get_schedule, schedule_version
+from apps.shared.conditional import conditional_response, make_etag, set_validators
+from .models import Booking, BookingSeries, WaitlistEntry
+from .occupancy import current_version as current_occupancy_version, get_occupancy_range
+from .serializers import (
+    BookingSerializer, BookingCreateSerializer, BookingSeriesSerializer, BulkTransitionSerializer,
+    CalendarQuerySerializer, FreeSlotsQuerySerializer, WaitlistEntrySerializer,
+)
+from .services import (
+    TRANSITIONS, booking_calendar, free_gaps, overlap_as_conflict, split_into_slots, transition_bookings,
+)
+
+
+def arena_booking_validators(request, arena_id):
+    """
+    (etag, stamp) for reads derived from an arena's bookings and working
+    hours, from one primary key lookup and the occupancy version; stamp is
+    (updated_at, occupancy version), which also version the arena's cached
+    schedule and occupancy. Both None if there is no arena.
+
+    No Last-Modified: bookings written within the same second would leave
+    If-Modified-Since answering 304 for a changed calendar.
+    """
+    updated_at = Arena.objects.filter(pk=arena_id).values_list("updated_at", flat=True).first()
+    if updated_at is None:
+        return None, None
+    stamp = (updated_at, current_occupancy_version(int(arena_id)))
+    etag = make_etag(request.path, request.META.get("QUERY_STRING", ""), *stamp)
+    return etag, stamp
 
 
 class BookingViewSet(viewsets.ModelViewSet):
@@ -30,112 +58,186 @@ class BookingViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         serializer.save()
 
+    def perform_update(self, serializer):
+        with overlap_as_conflict():
+            serializer.save()
+
     # ------------- ACTIONS ------------- #
 
-    @action(detail=True, methods=["post"])
-    def cancel(self, request, pk=None):
+    def _transition(self, action, allowed_error, message):
         booking = self.get_object()
 
-        if booking.status not in [BookingStatus.PENDING, BookingStatus.APPROVED]:
-            return Response({"error": "Bu bookingni bekor qilib bo‘lmaydi."}, status=400)
+        if booking.status not in TRANSITIONS[action][0]:
+            return Response({"error": allowed_error}, status=400)
 
-        booking.status = BookingStatus.CANCELED
-        booking.save()
-        return Response({"message": "Booking bekor qilindi."})
+        # holat o'qilgandan keyin boshqa so'rov uni o'zgartirgan bo'lishi mumkin
+        if not transition_bookings(Booking.objects.filter(pk=booking.pk), action):
+            return Response({"error": "Booking holati allaqachon o‘zgargan."}, status=409)
+        return Response({"message": message})
+
+    @action(detail=True, methods=["post"])
+    def cancel(self, request, pk=None):
+        return self._transition("cancel", "Bu bookingni bekor qilib bo‘lmaydi.", "Booking bekor qilindi.")
 
     @action(detail=True, methods=["post"], permission_classes=[permissions.IsAdminUser])
     def approve(self, request, pk=None):
-        booking = self.get_object()
-
-        if booking.status != BookingStatus.PENDING:
-            return Response({"error": "Faqat pending booking tasdiqlanadi."}, status=400)
-
-        booking.status = BookingStatus.APPROVED
-        booking.save()
-        return Response({"message": "Booking tasdiqlandi."})
+        return self._transition("approve", "Faqat pending booking tasdiqlanadi.", "Booking tasdiqlandi.")
 
     @action(detail=True, methods=["post"], permission_classes=[permissions.IsAdminUser])
     def reject(self, request, pk=None):
-        booking = self.get_object()
+        return self._transition("reject", "Faqat pending booking rad etiladi.", "Booking rad etildi.")
+
+    @action(detail=False, methods=["post"])
+    def bulk_transition(self, request):
+        """
+        {"action": "approve" | "reject" | "cancel", "ids": [...]} — bitta
+        UPDATE bilan. Admin hamma bookinglarni, arena egasi o'z arenalaridagi
+        bookinglarni o'zgartira oladi. Holati mos kelmaganlar `skipped` da.
+        """
+        serializer = BulkTransitionSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=400)
+        ids = serializer.validated_data["ids"]
 
-        if booking.status != BookingStatus.PENDING:
-            return Response({"error": "Faqat pending booking rad etiladi."}, status=400)
+        bookings = Booking.objects.filter(pk__in=ids)
+        if not request.user.is_staff:
+            bookings = bookings.filter(arena__owner=request.user)
 
-        booking.status = BookingStatus.REJECTED
-        booking.save()
-        return Response({"message": "Booking rad etildi."})
+        changed = transition_bookings(bookings, serializer.validated_data["action"])
+        return Response({"updated": changed, "skipped": sorted(set(ids) - set(changed))})
 
-    @action(detail=False, methods=["get"], url_path="calendar/(?P<arena_id>[^/.]+)")
+    @action(detail=False, methods=["get"], url_path=r"calendar/(?P<arena_id>\d+)")
     def calendar(self, request, arena_id=None):
         """
-        Arena uchun band qilingan vaqtlar ro‘yxatini beradi.
+        Arena uchun `date_from`..`date_to` oralig'ida band qilingan vaqtlar
+        (ko'pi bilan CALENDAR_MAX_DAYS kun), sana bo'yicha guruhlangan:
+        {"2025-12-15": [["10:00:00", "11:00:00", "approved"], ...]}.
         """
-        bookings = Booking.objects.filter(
-            arena_id=arena_id,
-            status__in=[BookingStatus.PENDING, BookingStatus.APPROVED]
-        ).order_by("date", "start_time")
+        etag, stamp = arena_booking_validators(request, arena_id)
+        response = conditional_response(request, etag)
+        if response is not None:
+            return response
+
+        params = CalendarQuerySerializer(data=request.query_params)
+        if not params.is_valid():
+            return Response(params.errors, status=status.HTTP_400_BAD_REQUEST)
+        if etag is None:
+            return Response({"error": "Arena topilmadi."}, status=404)
 
-        data = BookingSerializer(bookings, many=True).data
-        return Response(data)
+        date_from = params.validated_data["date_from"]
+        date_to = params.validated_data["date_to"]
+        return set_validators(Response({
+            "date_from": str(date_from),
+            "date_to": str(date_to),
+            "bookings": booking_calendar(int(arena_id), date_from, date_to, stamp[1]),
+        }), etag)
 
-    @action(detail=False, methods=["get"], url_path="free_slots/(?P<arena_id>[^/.]+)")
+    @action(detail=False, methods=["get"], url_path=r"free_slots/(?P<arena_id>\d+)")
     def free_slots(self, request, arena_id=None):
         """
         Berilgan arena va sana uchun bo'sh vaqtlarni qaytaradi.
+
+        `?date=` bitta kun uchun (eski format); `?date_from=&date_to=` bir
+        nechta kun uchun (ko'pi bilan FREE_SLOTS_MAX_DAYS), ixtiyoriy
+        `slot_minutes` bo'sh oraliqlarni shu uzunlikdagi slotlarga bo'ladi.
         """
-        date_str = request.query_params.get("date")
-        if not date_str:
-            return Response({"error": "date parametri majburiy. Masalan: ?date=2025-12-12"},
-                            status=status.HTTP_400_BAD_REQUEST)
-
-        try:
-            date_obj = datetime.strptime(date_str, "%Y-%m-%d").date()
-        except:
-            return Response({"error": "date formati noto'g'ri. YYYY-MM-DD bo'lishi kerak."},
-                            status=status.HTTP_400_BAD_REQUEST)
-
-        # Arena olish
-        from apps.arenas.models import Arena, WorkingHours
-        try:
-            arena = Arena.objects.get(id=arena_id)
-        except Arena.DoesNotExist:
+        etag, stamp = arena_booking_validators(request, arena_id)
+        response = conditional_response(request, etag)
+        if response is not None:
+            return response
+
+        if "date_from" in request.query_params:
+            params = FreeSlotsQuerySerializer(data=request.query_params)
+            if not params.is_valid():
+                return Response(params.errors, status=status.HTTP_400_BAD_REQUEST)
+            date_from = params.validated_data["date_from"]
+            date_to = params.validated_data["date_to"]
+            slot_minutes = params.validated_data.get("slot_minutes")
+        else:
+            date_str = request.query_params.get("date")
+            if not date_str:
+                return Response({"error": "date parametri majburiy. Masalan: ?date=2025-12-12"},
+                                status=status.HTTP_400_BAD_REQUEST)
+
+            try:
+                date_from = date_to = datetime.strptime(date_str, "%Y-%m-%d").date()
+            except ValueError:
+                return Response({"error": "date formati noto'g'ri. YYYY-MM-DD bo'lishi kerak."},
+                                status=status.HTTP_400_BAD_REQUEST)
+            slot_minutes = None
+
+        # validators topilmasa arena yo'q
+        if etag is None:
             return Response({"error": "Arena topilmadi."}, status=404)
 
-        weekday = date_obj.weekday()
-        working_hours = arena.working_hours.filter(day_of_week=weekday).first()
-
-        if not working_hours:
-            return Response({
-                "date": date_str,
-                "free_slots": [],
-                "message": "Bu kunda arena ishlamaydi."
-            })
-
-        open_time = working_hours.open_time
-        close_time = working_hours.close_time
-
-        # Band bookinglar
-        bookings = arena.bookings.filter(
-            date=date_obj,
-            status__in=[BookingStatus.PENDING, BookingStatus.APPROVED]
-        ).order_by("start_time")
+        # Band bookinglar: occupancy indeksidan, yetishmagan kunlar bitta so'rovda
+        days_occupancy = get_occupancy_range(int(arena_id), date_from, date_to, stamp[1])
+        bookings = (
+            (day, start, end)
+            for day, occupied in sorted(days_occupancy.items())
+            for start, end, _ in occupied.intervals
+        )
 
         # --- BO'SH INTERVALLARNI HISOBLASH --- #
-        free_slots = []
+        days = []
+        for day, hours, gaps in free_gaps(get_schedule(int(arena_id), schedule_version(stamp[0])), bookings, date_from, date_to):
+            if slot_minutes:
+                gaps = split_into_slots(gaps, slot_minutes)
+            days.append({
+                "date": str(day),
+                "working_hours": [str(hours[0]), str(hours[1])] if hours else None,
+                "free_slots": [[str(start), str(end)] for start, end in gaps],
+            })
 
-        current_start = open_time
+        if "date_from" not in request.query_params:
+            day = days[0]
+            if day["working_hours"] is None:
+                data = {"date": day["date"], "free_slots": [], "message": "Bu kunda arena ishlamaydi."}
+            else:
+                data = day
+            return set_validators(Response(data), etag)
+
+        return set_validators(Response({
+            "date_from": str(date_from),
+            "date_to": str(date_to),
+            "slot_minutes": slot_minutes,
+            "days": days,
+        }), etag)
+
+
+class BookingSeriesViewSet(mixins.CreateModelMixin,
+                           mixins.ListModelMixin,
+                           mixins.RetrieveModelMixin,
+                           viewsets.GenericViewSet):
+    """
+    Haftalik takrorlanuvchi bronlar. Yaratish hammasi yoki hech narsa:
+    band sanalar 409 bilan `conflicts` ro'yxatida qaytadi.
+    """
+    queryset = BookingSeries.objects.all()
+    serializer_class = BookingSeriesSerializer
+    permission_classes = [permissions.IsAuthenticated]
 
-        for b in bookings:
-            if current_start < b.start_time:
-                free_slots.append([str(current_start), str(b.start_time)])
-            current_start = max(current_start, b.end_time)
+    def get_queryset(self):
+        queryset = BookingSeries.objects.prefetch_related("occurrences").order_by("-created_at")
+        if self.request.user.is_staff:
+            return queryset
+        return queryset.filter(user=self.request.user)
+
+
+class WaitlistViewSet(mixins.CreateModelMixin,
+                      mixins.ListModelMixin,
+                      mixins.DestroyModelMixin,
+                      viewsets.GenericViewSet):
+    """
+    Band vaqt uchun navbat. Vaqt bo'shaganda (bekor qilish, rad etish,
+    muddati o'tish) eng birinchi mos yozuv egasiga xabar yuboriladi.
+    """
+    queryset = WaitlistEntry.objects.all()
+    serializer_class = WaitlistEntrySerializer
+    permission_classes = [permissions.IsAuthenticated]
 
-        # bandlar tugagandan keyin oxirgi segment
-        if current_start < close_time:
-            free_slots.append([str(current_start), str(close_time)])
+    def get_queryset(self):
+        return WaitlistEntry.objects.filter(user=self.request.user).order_by("-created_at")
 
-        return Response({
-            "date": date_str,
-            "working_hours": [str(open_time), str(close_time)],
-            "free_slots": free_slots
-        })
+    def perform_create(self, serializer):
+        serializer.save(user=self.request.user)
@@ -0,0 +1,88 @@
+"""
+Waitlist matching: when an active booking is cancelled, rejected or expires,
+the freed time is offered to the earliest waiting entry that fits in it.
+
+Matching runs after the releasing transaction commits (see
+services.released), reads the waiting entries of that one arena-day from
+the partial (arena, date) index and the free gaps from the occupancy index,
+so a release nobody waits for costs a single indexed query. Entries whose
+window has passed are expired by expire_waitlist_entries (run with the
+complete_past_bookings sweep), so that index only holds live entries.
+"""
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from apps.arenas.schedule import get_schedule
+from apps.shared.outbox import waitlist_slot_event
+from .models import WaitlistEntry, WaitlistStatus
+from .occupancy import get_occupancy
+from .services import free_gaps
+
+
+def _minutes(value):
+    return value.hour * 60 + value.minute
+
+
+def fits(entry, gap):
+    """The part of `gap` inside the entry's window, if it is long enough, else None."""
+    start, end = max(gap[0], entry.start_time), min(gap[1], entry.end_time)
+    needed = entry.duration_minutes or _minutes(entry.end_time) - _minutes(entry.start_time)
+    if _minutes(end) - _minutes(start) < needed:
+        return None
+    return start, end
+
+
+def match_waitlist(arena_id, day, start_time, end_time):
+    """
+    Notify the earliest waiting entry whose window can use the free gap
+    around [start_time, end_time) on `day`. Returns the notified entry or None.
+    """
+    entries = list(
+        WaitlistEntry.objects.filter(
+            arena_id=arena_id, date=day, status=WaitlistStatus.WAITING,
+            start_time__lt=end_time, end_time__gt=start_time,
+        ).order_by("created_at", "pk")
+    )
+    if not entries:
+        return None
+
+    occupancy = get_occupancy(arena_id, day)
+    bookings = [(day, start, end) for start, end, _ in occupancy.intervals]
+    _, _, gaps = next(free_gaps(get_schedule(arena_id), bookings, day, day))
+    # the released interval may since have been booked again, wholly or in part
+    gaps = [gap for gap in gaps if gap[0] < end_time and gap[1] > start_time]
+
+    for entry in entries:
+        window = next(filter(None, (fits(entry, gap) for gap in gaps)), None)
+        if window is None:
+            continue
+        with transaction.atomic():
+            claimed = WaitlistEntry.objects.filter(pk=entry.pk, status=WaitlistStatus.WAITING).update(
+                status=WaitlistStatus.NOTIFIED, notified_at=timezone.now()
+            )
+            if not claimed:
+                # a concurrent release got to this entry first
+                continue
+            waitlist_slot_event(entry.user_id, entry.pk, arena_id, day, *window).save()
+        return entry
+    return None
+
+
+def expire_waitlist_entries(batch_size=500, now=None):
+    """
+    Mark waiting entries whose window has ended as expired, in UPDATEs of
+    at most `batch_size` rows. Returns the number of expired entries.
+    """
+    now = timezone.localtime(now)
+    ended = Q(date__lt=now.date()) | Q(date=now.date(), end_time__lte=now.time())
+    waiting = WaitlistEntry.objects.filter(ended, status=WaitlistStatus.WAITING)
+
+    expired = 0
+    while True:
+        count = WaitlistEntry.objects.filter(
+            pk__in=list(waiting.values_list("pk", flat=True)[:batch_size]), status=WaitlistStatus.WAITING
+        ).update(status=WaitlistStatus.EXPIRED)
+        expired += count
+        if count < batch_size:
+            return expired
@@ -1,7 +1,8 @@
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings
 from django.utils import timezone
-from apps.bookings.models import Booking, BookingStatus
+from apps.bookings.models import Booking
+from apps.bookings.services import transition_bookings
 
 
 class PaymentStatus(models.TextChoices):
@@ -46,13 +47,13 @@ class Payment(models.Model):
         if payload:
             self.metadata = payload
         self.verified_at = timezone.now()
-        self.save()
+        with transaction.atomic():
+            self.save()
 
-        # agar booking biriktirilgan bo'lsa, uni paid deb belgilang
-        if self.booking:
-            self.booking.status = BookingStatus.APPROVED if self.booking.status == BookingStatus.PENDING else self.booking.status
-            # booking uchun maydon total_price dan farq bo'lsa ham to'lov bajarildi deb qabul qilamiz
-            self.booking.save()
+            # agar booking biriktirilgan bo'lsa va hali pending bo'lsa, uni tasdiqlang;
+            # compare-and-set, so a concurrent cancel or hold expiry is not overwritten
+            if self.booking_id:
+                transition_bookings(Booking.objects.filter(pk=self.booking_id), "approve")
 
     def mark_failed(self, payload=None):
         self.status = PaymentStatus.FAILED
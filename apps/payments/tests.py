@@ -1,3 +1,49 @@
+from datetime import date, time
+
+from django.contrib.auth import get_user_model
 from django.test import TestCase
 
-# Create your tests here.
+from apps.arenas.models import Arena, City, SportType
+from apps.bookings.models import Booking, BookingStatus
+from apps.shared.models import OutboxEvent
+from .models import Payment, PaymentMethod, PaymentStatus
+
+User = get_user_model()
+
+
+class PaymentSuccessTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username="payer", phone="+998900000031")
+        arena = Arena.objects.create(
+            owner=User.objects.create(username="payee", phone="+998900000032"),
+            name="Paid Arena",
+            city=City.objects.create(name="Tashkent"),
+            sport_type=SportType.objects.create(name="Football"),
+            address="Chilonzor 1",
+        )
+        self.booking = Booking.objects.create(
+            user=self.user, arena=arena, date=date(2025, 12, 15),
+            start_time=time(10), end_time=time(11), status=BookingStatus.PENDING,
+        )
+
+    def pay(self):
+        payment = Payment.objects.create(
+            booking=self.booking, user=self.user, amount=100, method=PaymentMethod.CLICK,
+        )
+        payment.mark_success(provider_id=f"tx-{payment.pk}")
+        return payment
+
+    def test_pending_booking_is_approved(self):
+        payment = self.pay()
+
+        self.assertEqual(Payment.objects.get(pk=payment.pk).status, PaymentStatus.SUCCESS)
+        self.assertEqual(Booking.objects.get(pk=self.booking.pk).status, BookingStatus.APPROVED)
+        self.assertEqual(OutboxEvent.objects.filter(user=self.user).count(), 1)
+
+    def test_cancelled_booking_stays_cancelled(self):
+        # cancelled in another request after the payment loaded its booking
+        Booking.objects.filter(pk=self.booking.pk).update(status=BookingStatus.CANCELED)
+        payment = self.pay()
+
+        self.assertEqual(Payment.objects.get(pk=payment.pk).status, PaymentStatus.SUCCESS)
+        self.assertEqual(Booking.objects.get(pk=self.booking.pk).status, BookingStatus.CANCELED)
@@ -4,4 +4,5 @@ class SharedConfig(AppConfig):
     name = "apps.shared"
 
     def ready(self):
+        import apps.shared.checks
         import apps.shared.signals
@@ -0,0 +1,39 @@
+"""
+Helpers for conditional GET (ETag / Last-Modified / 304).
+
+Views compute their validators from a cheap lookup *before* running the
+main query, return `conditional_response(...)` when the client's copy is still
+fresh and otherwise stamp the full response with `set_validators(...)`.
+"""
+import hashlib
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+
+def make_etag(*parts):
+    """Strong ETag from the given validator parts."""
+    digest = hashlib.md5(":".join(str(part) for part in parts).encode()).hexdigest()
+    return f'"{digest}"'
+
+
+def _timestamp(last_modified):
+    return int(last_modified.timestamp()) if last_modified else None
+
+
+def conditional_response(request, etag=None, last_modified=None):
+    """304 (or 412) response if the request's validators decide it, else None."""
+    response = get_conditional_response(
+        request, etag=etag, last_modified=_timestamp(last_modified)
+    )
+    if response is not None:
+        set_validators(response, etag, last_modified)
+    return response
+
+
+def set_validators(response, etag=None, last_modified=None):
+    if etag:
+        response["ETag"] = etag
+    if last_modified:
+        response["Last-Modified"] = http_date(_timestamp(last_modified))
+    return response
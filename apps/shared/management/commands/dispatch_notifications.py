@@ -0,0 +1,29 @@
+"""
+Django command to turn outbox events into notifications.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.shared.outbox import dispatch_outbox
+
+
+class Command(BaseCommand):
+    """Drain the notification outbox in batches."""
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument(
+            "--interval", type=float, default=0,
+            help="Keep running and poll every N seconds (0 = drain once and exit)",
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        while True:
+            dispatched = dispatch_outbox(batch_size=options["batch_size"])
+            if dispatched or not options["interval"]:
+                self.stdout.write(self.style.SUCCESS(f"Dispatched {dispatched} notifications"))
+            if not options["interval"]:
+                break
+            time.sleep(options["interval"])
@@ -16,3 +16,23 @@ class Notification(models.Model):
 
     def __str__(self):
         return f"{self.user.username} - {self.title}"
+
+
+class OutboxEvent(models.Model):
+    """
+    Something to tell a user, written in the same transaction as the change
+    that caused it and turned into notifications later by
+    `dispatch_notifications`. Rows are deleted once dispatched.
+    """
+    kind = models.CharField(max_length=50)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="+"
+    )
+    payload = models.JSONField(default=dict)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.kind} -> {self.user_id}"
@@ -0,0 +1,123 @@
+"""
+Transactional outbox for user notifications.
+
+Writers only insert cheap OutboxEvent rows inside their own transaction.
+`dispatch_outbox` (run by the dispatch_notifications command) drains them
+in batches, renders Notification rows and inserts them with bulk_create.
+"""
+import logging
+
+from django.db import transaction
+
+from .models import Notification, OutboxEvent
+
+BOOKING_STATUS = "booking_status"
+WAITLIST_SLOT_FREE = "waitlist_slot_free"
+BOOKING_HOLD_EXPIRED = "booking_hold_expired"
+
+logger = logging.getLogger(__name__)
+
+# booking statuses the user is told about
+NOTIFIED_STATUSES = ["approved", "rejected"]
+
+
+def booking_status_event(user_id, booking_id, status, arena_id, date):
+    return OutboxEvent(
+        kind=BOOKING_STATUS,
+        user_id=user_id,
+        payload={"booking": booking_id, "status": str(status), "arena": arena_id, "date": str(date)},
+    )
+
+
+def hold_expired_event(user_id, booking_id, arena_id, date, start_time):
+    return OutboxEvent(
+        kind=BOOKING_HOLD_EXPIRED,
+        user_id=user_id,
+        payload={
+            "booking": booking_id, "arena": arena_id, "date": str(date),
+            "start_time": start_time.strftime("%H:%M"),
+        },
+    )
+
+
+def waitlist_slot_event(user_id, entry_id, arena_id, date, start_time, end_time):
+    return OutboxEvent(
+        kind=WAITLIST_SLOT_FREE,
+        user_id=user_id,
+        payload={
+            "entry": entry_id, "arena": arena_id, "date": str(date),
+            "start_time": start_time.strftime("%H:%M"), "end_time": end_time.strftime("%H:%M"),
+        },
+    )
+
+
+def _format_booking_status(payload, arena_name):
+    return (
+        f"Your booking was {payload['status']}",
+        f"Arena: {arena_name}\nDate: {payload['date']}",
+    )
+
+
+def _format_hold_expired(payload, arena_name):
+    return (
+        "Your booking hold expired",
+        f"Arena: {arena_name}\nDate: {payload['date']}\nTime: {payload['start_time']}",
+    )
+
+
+def _format_waitlist_slot_free(payload, arena_name):
+    return (
+        "A time you were waiting for is free",
+        f"Arena: {arena_name}\nDate: {payload['date']}\nTime: {payload['start_time']}-{payload['end_time']}",
+    )
+
+
+# kind -> (payload, arena name) -> (title, message)
+FORMATTERS = {
+    BOOKING_STATUS: _format_booking_status,
+    WAITLIST_SLOT_FREE: _format_waitlist_slot_free,
+    BOOKING_HOLD_EXPIRED: _format_hold_expired,
+}
+
+
+def render(events):
+    """
+    Notifications for a batch of events, with the arena names of the whole
+    batch read in one query. Events of an unknown kind are logged and
+    dropped, so they cannot block the queue.
+    """
+    from apps.arenas.models import Arena
+
+    arena_names = dict(
+        Arena.objects.filter(pk__in={event.payload.get("arena") for event in events}).values_list("pk", "name")
+    )
+    notifications = []
+    for event in events:
+        formatter = FORMATTERS.get(event.kind)
+        if formatter is None:
+            logger.warning("Dropping outbox event %s of unknown kind %r", event.pk, event.kind)
+            continue
+        title, message = formatter(event.payload, arena_names.get(event.payload.get("arena"), ""))
+        notifications.append(Notification(user_id=event.user_id, title=title, message=message))
+    return notifications
+
+
+def dispatch_outbox(batch_size=500):
+    """
+    Turn pending outbox events into notifications, oldest first, one
+    transaction per batch. Events locked by another dispatcher are skipped,
+    so several can run side by side. Returns the number of events handled.
+    """
+    dispatched = 0
+    while True:
+        with transaction.atomic():
+            events = list(OutboxEvent.objects.select_for_update(skip_locked=True).order_by("pk")[:batch_size])
+            if not events:
+                break
+
+            Notification.objects.bulk_create(render(events))
+            OutboxEvent.objects.filter(pk__in=[event.pk for event in events]).delete()
+        dispatched += len(events)
+        if len(events) < batch_size:
+            break
+    return dispatched
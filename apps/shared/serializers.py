@@ -1,3 +1,4 @@
+from django.conf import settings
 from rest_framework import serializers
 from .models import Notification
 
@@ -5,6 +6,13 @@ from .models import Notification
 class UploadSerializer(serializers.Serializer):
     file = serializers.FileField()
 
+    def validate_file(self, value):
+        if value.size > settings.UPLOAD_MAX_SIZE:
+            raise serializers.ValidationError(
+                f"File too large, limit is {settings.UPLOAD_MAX_SIZE // (1024 * 1024)} MB"
+            )
+        return value
+
 
 class NotificationSerializer(serializers.ModelSerializer):
     class Meta:
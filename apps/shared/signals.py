@@ -1,14 +1,15 @@
 from django.dispatch import receiver
 from django.db.models.signals import post_save
 from apps.bookings.models import Booking
-from .models import Notification
+from .outbox import NOTIFIED_STATUSES, booking_status_event
 
 
 @receiver(post_save, sender=Booking)
 def booking_status_change(sender, instance, created, **kwargs):
-    if not created and instance.status in ["approved", "rejected"]:
-        Notification.objects.create(
-            user=instance.user,
-            title=f"Your booking was {instance.status}",
-            message=f"Arena: {instance.arena.name}\nDate: {instance.date}"
-        )
+    # only real status changes; the notification itself is made by the dispatcher
+    loaded_status = getattr(instance, "_loaded_status", None)
+    if created or instance.status == loaded_status or instance.status not in NOTIFIED_STATUSES:
+        return
+    booking_status_event(
+        instance.user_id, instance.pk, instance.status, instance.arena_id, instance.date
+    ).save()
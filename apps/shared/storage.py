@@ -0,0 +1,87 @@
+"""
+Content-addressed storage for user uploads.
+
+Files are stored as `<prefix>/ab/cd/<sha256><ext>`, so identical uploads
+share one stored file and names never collide. On local storage the upload
+is copied once, to a temporary name, hashed chunk by chunk during that copy
+and then renamed to its digest. Remote storage cannot rename, so there the
+upload is hashed where it already is and uploaded once, to its digest.
+"""
+import hashlib
+import os
+import uuid
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage, default_storage
+
+
+class HashingFile(File):
+    """Wraps an upload so that reading it through chunks() also hashes it."""
+
+    def __init__(self, file):
+        super().__init__(file, name=file.name)
+        self.sha256 = hashlib.sha256()
+
+    def chunks(self, chunk_size=None):
+        for chunk in self.file.chunks(chunk_size):
+            self.sha256.update(chunk)
+            yield chunk
+
+
+def content_path(digest, name, prefix="uploads"):
+    extension = os.path.splitext(name)[1].lower()[:10]
+    return f"{prefix}/{digest[:2]}/{digest[2:4]}/{digest}{extension}"
+
+
+def _hash_upload(file):
+    """SHA-256 of an upload that is still local (in memory or a temporary file)."""
+    sha256 = hashlib.sha256()
+    for chunk in file.chunks():
+        sha256.update(chunk)
+    file.seek(0)
+    return sha256.hexdigest()
+
+
+def _save_streamed(file, prefix, storage):
+    """
+    Local storage: copy the upload once, to a temporary name, hashing it
+    during that copy, then move it onto its digest with os.replace.
+    """
+    extension = os.path.splitext(file.name)[1].lower()[:10]
+    hashing = HashingFile(file)
+    # a wrapper without temporary_file_path(), so storage streams it through chunks()
+    temporary = storage.save(f"{prefix}/tmp/{uuid.uuid4().hex}{extension}", hashing)
+
+    digest = hashing.sha256.hexdigest()
+    path = content_path(digest, file.name, prefix)
+    if storage.exists(path):
+        storage.delete(temporary)
+        return path, digest, False
+
+    target = storage.path(path)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    os.replace(storage.path(temporary), target)
+    return path, digest, True
+
+
+def save_content_addressed(file, prefix="uploads", storage=default_storage):
+    """
+    Store `file` under its SHA-256. Returns (path, digest, created); `created`
+    is False when the same content was already stored.
+    """
+    if isinstance(storage, FileSystemStorage):
+        return _save_streamed(file, prefix, storage)
+
+    # remote storage has no rename, and a copy would download and upload the
+    # file again: hash the local upload first and upload it once, to its digest
+    digest = _hash_upload(file)
+    path = content_path(digest, file.name, prefix)
+    if storage.exists(path):
+        return path, digest, False
+
+    saved = storage.save(path, file)
+    if saved != path:
+        # lost a race with an identical upload: keep the canonical copy
+        storage.delete(saved)
+        return path, digest, False
+    return path, digest, True
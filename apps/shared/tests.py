@@ -1,3 +1,134 @@
-from django.test import TestCase
+import shutil
+import tempfile
 
-# Create your tests here.
+from datetime import date, time
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.files.storage import InMemoryStorage, default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.test import APIClient
+
+from apps.arenas.models import Arena, City, SportType
+from apps.bookings.models import Booking, BookingStatus
+from .checks import check_shared_cache
+from .models import Notification, OutboxEvent
+from .outbox import booking_status_event, dispatch_outbox, hold_expired_event, waitlist_slot_event
+from .storage import save_content_addressed
+
+User = get_user_model()
+
+
+class FileUploadTest(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=media_root, UPLOAD_MAX_SIZE=1024)
+        media.enable()
+        self.addCleanup(media.disable)
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create(username="uploader", phone="+998900000009"))
+
+    def upload(self, name, content):
+        return self.client.post(
+            "/api/upload/", {"file": SimpleUploadedFile(name, content)}, format="multipart"
+        )
+
+    def test_identical_content_is_stored_once(self):
+        first = self.upload("a.PDF", b"same bytes")
+        second = self.upload("b.pdf", b"same bytes")
+
+        self.assertEqual(first.status_code, 201)
+        self.assertFalse(first.data["deduplicated"])
+        self.assertTrue(second.data["deduplicated"])
+        self.assertEqual(first.data["file_url"], second.data["file_url"])
+
+        digest = first.data["sha256"]
+        path = f"uploads/{digest[:2]}/{digest[2:4]}/{digest}.pdf"
+        self.assertTrue(default_storage.exists(path))
+        self.assertEqual(first.data["size"], 10)
+        self.assertEqual(default_storage.listdir("uploads/tmp")[1], [])
+
+    def test_remote_storage_is_written_once_to_the_digest(self):
+        storage = InMemoryStorage()
+        path, digest, created = save_content_addressed(SimpleUploadedFile("a.txt", b"remote"), storage=storage)
+        self.assertTrue(created)
+        self.assertEqual(path, f"uploads/{digest[:2]}/{digest[2:4]}/{digest}.txt")
+        self.assertEqual(storage.listdir("uploads")[0], [digest[:2]])
+
+        again = save_content_addressed(SimpleUploadedFile("b.txt", b"remote"), storage=storage)
+        self.assertEqual(again, (path, digest, False))
+
+    def test_size_limit(self):
+        response = self.upload("big.bin", b"x" * 2048)
+        self.assertEqual(response.status_code, 400)
+
+        response = self.upload("huge.bin", b"x" * (200 * 1024))
+        self.assertEqual(response.status_code, 413)
+
+
+class NotificationOutboxTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username="player", phone="+998900000002")
+        arena = Arena.objects.create(
+            owner=User.objects.create(username="owner", phone="+998900000001"),
+            name="Bunyodkor", city=City.objects.create(name="Tashkent"),
+            sport_type=SportType.objects.create(name="Football"), address="Chilonzor 1",
+        )
+        self.booking = Booking.objects.create(
+            user=self.user, arena=arena, date=date(2025, 12, 15), start_time=time(10), end_time=time(11),
+        )
+
+    def test_only_status_changes_enqueue(self):
+        booking = Booking.objects.get(pk=self.booking.pk)
+        booking.total_price = 100
+        booking.save()
+        self.assertFalse(OutboxEvent.objects.exists())
+
+        booking.status = BookingStatus.APPROVED
+        with self.assertNumQueries(2):  # booking, outbox
+            booking.save(update_fields=["status"])
+        booking.save()
+        self.assertEqual(OutboxEvent.objects.count(), 1)
+        self.assertFalse(Notification.objects.exists())
+
+        out = StringIO()
+        call_command("dispatch_notifications", stdout=out)
+        self.assertIn("Dispatched 1", out.getvalue())
+        notification = Notification.objects.get(user=self.user)
+        self.assertEqual(notification.title, "Your booking was approved")
+        self.assertIn("Bunyodkor", notification.message)
+        self.assertFalse(OutboxEvent.objects.exists())
+
+    def test_mixed_batch_reads_arena_names_once_and_drops_unknown_kinds(self):
+        arena_id = self.booking.arena_id
+        OutboxEvent.objects.bulk_create([
+            booking_status_event(self.user.pk, self.booking.pk, "approved", arena_id, self.booking.date),
+            hold_expired_event(self.user.pk, self.booking.pk, arena_id, self.booking.date, time(10)),
+            waitlist_slot_event(self.user.pk, 1, arena_id, self.booking.date, time(10), time(11)),
+            OutboxEvent(kind="retired_kind", user=self.user, payload={}),
+        ])
+
+        # savepoint, lock, arena names (once), insert, delete, release
+        with self.assertLogs("apps.shared.outbox", "WARNING"), self.assertNumQueries(6):
+            self.assertEqual(dispatch_outbox(), 4)
+        self.assertEqual(
+            sorted(Notification.objects.values_list("title", flat=True)),
+            ["A time you were waiting for is free", "Your booking hold expired", "Your booking was approved"],
+        )
+        self.assertFalse(OutboxEvent.objects.exists())
+
+
+class SharedCacheCheckTest(SimpleTestCase):
+    def test_process_local_cache_is_rejected_outside_debug(self):
+        locmem = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+        redis = {"default": {"BACKEND": "django.core.cache.backends.redis.RedisCache", "LOCATION": "redis://redis"}}
+
+        with override_settings(DEBUG=False, CACHES=locmem):
+            self.assertEqual([error.id for error in check_shared_cache(None)], ["shared.E001"])
+        with override_settings(DEBUG=True, CACHES=locmem):
+            self.assertEqual(check_shared_cache(None), [])
+        with override_settings(DEBUG=False, CACHES=redis):
+            self.assertEqual(check_shared_cache(None), [])
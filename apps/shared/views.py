@@ -3,8 +3,9 @@ from rest_framework.response import Response
 from rest_framework import permissions, status
 from .serializers import UploadSerializer, NotificationSerializer
 from .models import Notification
+from django.conf import settings
 from django.core.files.storage import default_storage
-from django.core.files.base import ContentFile
+from .storage import save_content_addressed
 from rest_framework import generics
 from rest_framework.decorators import api_view, permission_classes
 
@@ -13,11 +14,21 @@ class FileUploadView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def post(self, request):
+        # refuse oversized bodies before the multipart parser reads them
+        content_length = int(request.META.get("CONTENT_LENGTH") or 0)
+        if content_length > settings.UPLOAD_MAX_SIZE + 64 * 1024:
+            return Response({"error": "File too large"}, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+
         serializer = UploadSerializer(data=request.data)
         if serializer.is_valid():
             file = serializer.validated_data["file"]
-            path = default_storage.save(f"uploads/{file.name}", ContentFile(file.read()))
-            return Response({"file_url": default_storage.url(path)}, status=201)
+            path, digest, created = save_content_addressed(file)
+            return Response({
+                "file_url": default_storage.url(path),
+                "sha256": digest,
+                "size": file.size,
+                "deduplicated": not created,
+            }, status=201)
         return Response(serializer.errors, status=400)
 
 
@@ -1,6 +1,6 @@
 
 from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.pagination import CursorPagination, PageNumberPagination
 from rest_framework.response import Response
 
 
@@ -56,3 +56,14 @@ class CustomPageNumberPagination(PageNumberPagination):
             },
             'results': data
         })
+
+
+class CreatedAtCursorPagination(CursorPagination):
+    """
+    Newest first, keyset-paginated: each page is an index range scan no
+    matter how deep the client scrolls.
+    """
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = '-created_at'
@@ -34,3 +34,16 @@ DB_PASS = env('DB_PASS', default='havas')
 DB_HOST = env('DB_HOST', default='db')
 DB_PORT = env('DB_PORT', default=5432)
 
+# BOOKINGS
+# minutes a checkout hold (pending booking created with hold=true) keeps its slot
+# before expire_pending_bookings cancels it
+BOOKING_HOLD_MINUTES = env.int('BOOKING_HOLD_MINUTES', default=15)
+
+# UPLOADS
+# files above FILE_UPLOAD_MAX_MEMORY_SIZE are spooled to disk instead of RAM
+UPLOAD_MAX_SIZE = env.int('UPLOAD_MAX_SIZE', default=20 * 1024 * 1024)
+FILE_UPLOAD_MAX_MEMORY_SIZE = env.int('FILE_UPLOAD_MAX_MEMORY_SIZE', default=1024 * 1024)
+
+# CACHE SETTINGS
+# locmem is per process and only fit for development; `check --deploy` (run.sh) rejects it
+CACHE = env.cache_url('CACHE_URL', default='locmemcache://')
@@ -40,6 +40,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
 
     "rest_framework",
     "rest_framework_simplejwt",
@@ -147,6 +148,11 @@ DATABASES = {
 
 
 
+CACHES = {
+    'default': config.CACHE,
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -187,6 +193,15 @@ STATIC_ROOT = os.path.join(BASE_DIR, "static")
 MEDIA_URL = 'media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, "media")
 
+# pending bookings older than this are cancelled by expire_pending_bookings
+BOOKING_HOLD_MINUTES = config.BOOKING_HOLD_MINUTES
+
+# largest accepted upload (apps.shared.views.FileUploadView); bigger bodies
+# are rejected before they are read, smaller ones are spooled to disk past
+# FILE_UPLOAD_MAX_MEMORY_SIZE
+UPLOAD_MAX_SIZE = config.UPLOAD_MAX_SIZE
+FILE_UPLOAD_MAX_MEMORY_SIZE = config.FILE_UPLOAD_MAX_MEMORY_SIZE
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -3,6 +3,7 @@
 set -e
 
 python manage.py wait_for_db
+python manage.py check --deploy --fail-level ERROR
 python manage.py collectstatic --noinput
 python manage.py migrate
 